@@ -0,0 +1,157 @@
+"""
+Compares the searches of game_model/routing.py with the list-based search of the original Car.astar.
+
+For every map in scenarios/scenarios.py a fixed sample of (start segment, goal lane segment) pairs is routed
+with the original list-based search, fifo_search (the search Car.astar uses now), the heap-based astar_search on
+the segment objects and the AstarRouter on the compiled network with its cached, vectorized heuristic. The
+expanded segments and the wall time are reported. fifo_search must return exactly the paths of the original
+search; for the other searches the number of different paths and of strictly shorter paths is reported, which is
+why they are not the default.
+
+Run from the repository root:
+    python -m benchmarks.astar_benchmark [--pairs 500] [--seed 0]
+"""
+import argparse
+import copy
+import random
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from game_model.compiled_network import CompiledNetwork
+from game_model.create_game import create_segments
+from game_model.road_network import LaneSegment, Segment
+from game_model.routing import AstarRouter, astar_heuristic, astar_search, fifo_search, next_segments
+from scenarios import scenarios
+
+
+def legacy_astar_search(start_seg: Segment, goal_seg: LaneSegment) -> Tuple[Optional[List[Segment]], int]:
+    """
+    The original search of Car.astar: a plain list popped from the front, without a closed set.
+
+    Args:
+        start_seg (Segment): The segment the search starts from.
+        goal_seg (LaneSegment): The segment the search tries to reach.
+
+    Returns:
+        Tuple[Optional[List[Segment]], int]: The path (None if there is no path) and the number of expanded segments.
+    """
+    open_list = [(0, start_seg)]
+    came_from: dict[Segment, Segment] = {}
+    g_score = {start_seg: 0}
+    f_score = {start_seg: astar_heuristic(start_seg, goal_seg)}
+    expanded = 0
+    while open_list:
+        _, current_seg = open_list.pop(0)
+
+        if current_seg == goal_seg:
+            path = [current_seg]
+            while current_seg in came_from:
+                current_seg = came_from[current_seg]
+                path.insert(0, current_seg)
+            return path, expanded
+
+        expanded += 1
+        for neighbor in next_segments(current_seg):
+            if neighbor not in g_score:
+                g_score[neighbor] = float('inf')
+                f_score[neighbor] = float('inf')
+            tentative_g_score = g_score[current_seg] + current_seg.length
+
+            if tentative_g_score < g_score[neighbor]:
+                came_from[neighbor] = current_seg
+                g_score[neighbor] = tentative_g_score
+                f_score[neighbor] = g_score[neighbor] + astar_heuristic(neighbor, goal_seg)
+                open_list.append((f_score[neighbor], neighbor))
+
+    return None, expanded
+
+
+def path_cost(path: Optional[List[Segment]]) -> float:
+    """
+    The cost of a path as used by the searches: the length of every segment except the last one.
+    """
+    if path is None:
+        return float('inf')
+    return sum(seg.length for seg in path[:-1])
+
+
+def load_scenarios() -> Dict[str, dict]:
+    """
+    Collect every scenario dictionary defined in scenarios/scenarios.py.
+    """
+    return {name: value for name, value in vars(scenarios).items()
+            if isinstance(value, dict) and "roads" in value}
+
+
+def router_search(router: AstarRouter) -> Callable[[Segment, LaneSegment], Tuple[Optional[List[Segment]], int]]:
+    """
+    Wrap a router into a search function returning the path and the number of expanded segments.
+    """
+    def search(start_seg: Segment, goal_seg: LaneSegment) -> Tuple[Optional[List[Segment]], int]:
+        expanded = router.expanded_nodes
+        path = router.route(start_seg, goal_seg)
+        return path, router.expanded_nodes - expanded
+    return search
+
+
+def benchmark_scenario(scenario: dict, pairs: int, rng: random.Random) -> Dict[str, float]:
+    """
+    Route a sample of segment pairs of one scenario with every search.
+
+    Args:
+        scenario (dict): The scenario dictionary.
+        pairs (int): The number of (start, goal) pairs to route.
+        rng (random.Random): The random generator used to sample the pairs.
+
+    Returns:
+        Dict[str, float]: The measurements of every search.
+    """
+    segments, intersections = create_segments(copy.deepcopy(scenario["roads"]))
+    lane_segments = [seg for seg in segments if isinstance(seg, LaneSegment)]
+    queries = [(rng.choice(segments), rng.choice(lane_segments)) for _ in range(pairs)]
+    router = AstarRouter(CompiledNetwork(segments, intersections))
+
+    results = {"segments": len(segments), "pairs": pairs}
+    legacy_paths = []
+    for name, search in (("legacy", legacy_astar_search), ("fifo", fifo_search), ("heap", astar_search),
+                         ("router", router_search(router))):
+        expanded = 0
+        paths = []
+        start_time = time.perf_counter()
+        for start_seg, goal_seg in queries:
+            path, nodes = search(start_seg, goal_seg)
+            expanded += nodes
+            paths.append(path)
+        results[f"{name}_time"] = time.perf_counter() - start_time
+        results[f"{name}_expanded"] = expanded
+        if name == "legacy":
+            legacy_paths = paths
+        else:
+            results[f"{name}_different"] = sum(path != legacy_path for path, legacy_path in zip(paths, legacy_paths))
+            results[f"{name}_shorter"] = sum(path_cost(path) < path_cost(legacy_path)
+                                             for path, legacy_path in zip(paths, legacy_paths))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pairs", type=int, default=500, help="Number of (start, goal) pairs per scenario")
+    parser.add_argument("--seed", type=int, default=0, help="Seed used to sample the pairs")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    names = ("legacy", "fifo", "heap", "router")
+    print(f"{'':<24}{'':>9}{'expanded segments':>36}{'wall time (ms)':>36}{'different (shorter) paths':>33}")
+    print(f"{'scenario':<24}{'segments':>9}" + "".join(f"{name:>9}" for name in names)
+          + "".join(f"{name:>9}" for name in names) + "".join(f"{name:>11}" for name in names[1:]))
+    for name, scenario in load_scenarios().items():
+        results = benchmark_scenario(scenario, args.pairs, rng)
+        print(f"{name:<24}{results['segments']:>9}"
+              + "".join(f"{results[f'{search}_expanded']:>9}" for search in names)
+              + "".join(f"{1000 * results[f'{search}_time']:>9.1f}" for search in names)
+              + "".join(f"{results[f'{search}_different']:>5} ({results[f'{search}_shorter']:>3})"
+                        for search in names[1:]))
+
+
+if __name__ == '__main__':
+    main()
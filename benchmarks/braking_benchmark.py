@@ -0,0 +1,89 @@
+"""
+Compares the braking distance lookup table of game_model/braking.py with adding up the distance one time step at
+a time, as Car.get_braking_distance did before.
+
+The scalar lookup is timed on random speeds a controller considers, from 0 to MAX_TABLE_SPEED, and the vectorized
+lookup on arrays of such speeds against the closed form of the arithmetic series. All variants must agree on every
+speed up to twice MAX_TABLE_SPEED, which is checked before the timings are printed.
+
+Run from the repository root:
+    python -m benchmarks.braking_benchmark [--count 100000] [--repeat 20] [--seed 0]
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from game_model.braking import MAX_TABLE_SPEED, braking_sum, braking_sums
+from game_model.constants import MAX_DEC
+
+
+def loop_braking_sum(speed: int) -> int:
+    """
+    Add up the braking distance one time step at a time.
+
+    Args:
+        speed (int): The speed.
+
+    Returns:
+        int: The distance.
+    """
+    braking = 0
+    while speed > 0:
+        braking += speed
+        speed -= MAX_DEC
+    return braking
+
+
+def closed_form_braking_sums(speed: np.ndarray) -> np.ndarray:
+    """
+    Get the braking distance of every speed from the sum of the arithmetic series.
+
+    Args:
+        speed (np.ndarray): The speeds.
+
+    Returns:
+        np.ndarray: The distances.
+    """
+    steps = -(-speed // MAX_DEC)
+    return steps * speed - MAX_DEC * steps * (steps - 1) // 2
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=100000, help="Number of speeds per run")
+    parser.add_argument("--repeat", type=int, default=20, help="Number of runs of the vectorized lookups")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    all_speeds = np.arange(2 * MAX_TABLE_SPEED + 1)
+    expected = [loop_braking_sum(speed) for speed in all_speeds.tolist()]
+    same = [braking_sum(speed) for speed in all_speeds.tolist()] == expected \
+        and braking_sums(all_speeds).tolist() == expected \
+        and closed_form_braking_sums(all_speeds).tolist() == expected
+    print(f"speeds 0 to {2 * MAX_TABLE_SPEED}: {'same' if same else 'DIFFERENT'}")
+
+    rng = random.Random(args.seed)
+    speeds = [rng.randint(0, MAX_TABLE_SPEED) for _ in range(args.count)]
+    speed_array = np.array(speeds, dtype=np.int64)
+
+    timings = []
+    for name, function in (("loop", loop_braking_sum), ("table", braking_sum)):
+        start_time = time.perf_counter()
+        for speed in speeds:
+            function(speed)
+        timings.append((f"scalar {name}", (time.perf_counter() - start_time) / args.count))
+    for name, function in (("closed form", closed_form_braking_sums), ("table", braking_sums)):
+        start_time = time.perf_counter()
+        for _ in range(args.repeat):
+            function(speed_array)
+        timings.append((f"array {name}", (time.perf_counter() - start_time) / (args.repeat * args.count)))
+
+    print(f"{'variant':<20}{'ns/speed':>10}")
+    for name, seconds in timings:
+        print(f"{name:<20}{1e9 * seconds:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Measures the time of one TrafficEnv.play_step against the number of players, with the segment-indexed
+broad-phase crash detection and with the all-pairs loop it replaced.
+
+Both runs of a player count start from the same random seed on a grid_scenario with two lanes per road and
+must produce the same trajectories and crashes; a mismatch is reported.
+
+Run from the repository root:
+    python -m benchmarks.crash_detection_benchmark [--players 20 40 80 160] [--ticks 50] [--seed 0]
+"""
+import argparse
+import contextlib
+import io
+import random
+import time
+from typing import List, Tuple
+
+from game_model.game_model import TrafficEnv
+from scenarios.scenarios import grid_scenario
+
+
+def run(players: int, ticks: int, seed: int, broad_phase: bool, grid: int) -> Tuple[float, int, List[tuple]]:
+    """
+    Run the environment for a number of ticks.
+
+    Args:
+        players (int): The number of players.
+        ticks (int): The number of calls to play_step.
+        seed (int): The random seed.
+        broad_phase (bool): Whether to use the broad-phase crash detection.
+        grid (int): The number of horizontal (and vertical) roads of the grid.
+
+    Returns:
+        Tuple[float, int, List[tuple]]: The mean time per tick in seconds, the number of crashes and the trace of
+            the car states.
+    """
+    random.seed(seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        env = TrafficEnv(roads=grid_scenario(grid, grid, lanes=2)["roads"], players=players, broad_phase=broad_phase)
+        trace = []
+        elapsed = 0.0
+        for _ in range(ticks):
+            start_time = time.perf_counter()
+            game_over = env.play_step()
+            elapsed += time.perf_counter() - start_time
+            trace.append(tuple((car.name, car.loc, car.speed, car.dead) for car in env.cars))
+            if game_over:
+                break
+    return elapsed / len(trace), env.total_crashes, trace
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, nargs="+", default=[20, 40, 80, 160], help="Player counts")
+    parser.add_argument("--ticks", type=int, default=50, help="Number of ticks per run")
+    parser.add_argument("--grid", type=int, default=8, help="Number of horizontal (and vertical) roads")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    print(f"{'players':>8}{'all pairs ms':>14}{'broad phase ms':>16}{'speedup':>9}{'crashes':>9}{'same':>6}")
+    for players in args.players:
+        brute_time, brute_crashes, brute_trace = run(players, args.ticks, args.seed, False, args.grid)
+        broad_time, broad_crashes, broad_trace = run(players, args.ticks, args.seed, True, args.grid)
+        same = brute_trace == broad_trace and brute_crashes == broad_crashes
+        print(f"{players:>8}{1000 * brute_time:>14.2f}{1000 * broad_time:>16.2f}{brute_time / broad_time:>8.1f}x"
+              f"{broad_crashes:>9}{'yes' if same else 'NO':>6}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Measures the time per tick of the two-phase tick mode against the number of decision worker processes and
+of replica worker processes.
+
+A grid_scenario with two lanes per road is run from the same seed with the sequential tick, and with the
+two-phase tick for every worker and replica count. All two-phase runs must produce the same trajectories; the
+sequential tick lets cars react to the moves earlier in the tick and is only listed for reference. Worker
+processes only pay off with several cores and many controllers.
+
+Run from the repository root:
+    python -m benchmarks.decision_benchmark [--players 500] [--workers 0 2 4 8] [--replicas 2 4 8] [--ticks 20]
+"""
+import argparse
+import contextlib
+import io
+import random
+import time
+from typing import List, Tuple
+
+from game_model.game_model import TrafficEnv
+from scenarios.scenarios import grid_scenario
+
+
+def run(players: int, ticks: int, seed: int, grid: int, **kwargs) -> Tuple[float, List[tuple]]:
+    """
+    Run the environment for a number of ticks.
+
+    Args:
+        players (int): The number of players.
+        ticks (int): The number of calls to play_step.
+        seed (int): The random seed.
+        grid (int): The number of horizontal (and vertical) roads of the grid.
+        **kwargs: Passed on to TrafficEnv.
+
+    Returns:
+        Tuple[float, List[tuple]]: The mean time per tick in seconds and the trace of the car states.
+    """
+    random.seed(seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        env = TrafficEnv(roads=grid_scenario(grid, grid, lanes=2)["roads"], players=players, **kwargs)
+        trace = []
+        start_time = time.perf_counter()
+        for _ in range(ticks):
+            game_over = env.play_step()
+            trace.append(tuple((car.name, car.loc, car.speed, car.dead, car.score) for car in env.cars))
+            if game_over:
+                break
+        elapsed = time.perf_counter() - start_time
+        env.close()
+    return elapsed / len(trace), trace
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=500, help="Number of players")
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 2, 4, 8], help="Worker counts")
+    parser.add_argument("--replicas", type=int, nargs="+", default=[2, 4, 8], help="Replica worker counts")
+    parser.add_argument("--ticks", type=int, default=20, help="Number of ticks per run")
+    parser.add_argument("--grid", type=int, default=16, help="Number of horizontal (and vertical) roads")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    sequential_time, _ = run(args.players, args.ticks, args.seed, args.grid)
+    print(f"{'mode':<26}{'ms/tick':>10}{'same':>6}")
+    print(f"{'sequential':<26}{1000 * sequential_time:>10.1f}")
+    reference = None
+    for workers in args.workers:
+        tick_time, trace = run(args.players, args.ticks, args.seed, args.grid, two_phase=True,
+                               decision_workers=workers)
+        reference = trace if reference is None else reference
+        print(f"{f'two-phase, {workers} workers':<26}{1000 * tick_time:>10.1f}{'yes' if trace == reference else 'NO':>6}")
+    for replicas in args.replicas:
+        tick_time, trace = run(args.players, args.ticks, args.seed, args.grid, two_phase=True,
+                               replica_workers=replicas)
+        reference = trace if reference is None else reference
+        print(f"{f'two-phase, {replicas} replicas':<26}{1000 * tick_time:>10.1f}{'yes' if trace == reference else 'NO':>6}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Compares the batched lane kinematics of game_model/kinematics.py with calling Car.move on every car.
+
+Large numbers of cars are placed on the lane segments of ONE_ROAD (create_random_car needs a free lane segment
+per car, so the cars are placed by hand, several per segment) and moved at constant speed for a number of ticks,
+once with Car.move and once with move_cars. There is no crash detection, so only the kinematics is measured.
+Both fleets must end in the same state.
+
+Run from the repository root:
+    python -m benchmarks.kinematics_benchmark [--players 100 500 2000] [--ticks 100] [--seed 0]
+"""
+import argparse
+import contextlib
+import copy
+import io
+import random
+import time
+from typing import List, Tuple
+
+from game_model.car import Car
+from game_model.game_model import TrafficEnv
+from game_model.kinematics import move_cars
+from game_model.road_network import LaneSegment, true_direction
+from scenarios.scenarios import ONE_ROAD
+
+
+def create_fleet(players: int, seed: int) -> List[Car]:
+    """
+    Place cars with random speeds and sizes at random locations of the lane segments of ONE_ROAD.
+
+    Args:
+        players (int): The number of cars.
+        seed (int): The random seed.
+
+    Returns:
+        List[Car]: The cars, with their goals placed.
+    """
+    random.seed(seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        env = TrafficEnv(roads=copy.deepcopy(ONE_ROAD["roads"]), players=0)
+    lane_segments = [seg for seg in env.segments if isinstance(seg, LaneSegment)]
+    cars = []
+    for i in range(players):
+        segment = lane_segments[i % len(lane_segments)]
+        sign = 1 if true_direction[segment.lane.direction] else -1
+        max_speed = random.randint(5, 13)
+        car = Car(name=f"car{i}", loc=sign * random.randrange(segment.length // 2), segment=segment,
+                  speed=random.randint(1, max_speed), size=random.randint(20, 60), color=(0, 0, 0),
+                  max_speed=max_speed)
+        car.router = env.router
+        env._place_goals(car)
+        cars.append(car)
+    return cars
+
+
+def state(cars: List[Car]) -> List[Tuple]:
+    """
+    The kinematic state of every car.
+    """
+    return [(car.loc, car.time, car.pos.x, car.pos.y, car.w, car.h,
+             tuple((str(seg_info.segment), seg_info.begin, seg_info.end, seg_info.direction) for seg_info in car.res))
+            for car in cars]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, nargs="+", default=[100, 500, 2000], help="Numbers of cars")
+    parser.add_argument("--ticks", type=int, default=100, help="Number of ticks")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    print(f"{'players':>8}{'Car.move ms':>13}{'move_cars ms':>14}{'speedup':>9}{'same':>6}")
+    for players in args.players:
+        results = []
+        for batched in (False, True):
+            cars = create_fleet(players, args.seed)
+            start_time = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                for _ in range(args.ticks):
+                    if batched:
+                        move_cars(cars)
+                    else:
+                        for car in cars:
+                            car.move()
+            results.append(((time.perf_counter() - start_time) / args.ticks, state(cars)))
+        (move_time, move_state), (batch_time, batch_state) = results
+        print(f"{players:>8}{1000 * move_time:>13.2f}{1000 * batch_time:>14.2f}{move_time / batch_time:>8.1f}x"
+              f"{'yes' if move_state == batch_state else 'NO':>6}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Compares the straight-line A* heuristic with landmark (ALT) heuristics on one-way grids of increasing size.
+
+Grids are created with grid_scenario. For each grid a fixed sample of (start segment, goal lane segment) pairs
+is routed with the AstarRouter and with LandmarkRouters of different numbers of landmarks, reporting the
+preprocessing time, the expanded segments and the query time. All routers must return paths of the same cost.
+
+Run from the repository root:
+    python -m benchmarks.landmark_benchmark [--sizes 4 8 16 32] [--landmarks 4 8 16] [--pairs 200] [--seed 0]
+"""
+import argparse
+import random
+import time
+
+from game_model.compiled_network import CompiledNetwork
+from game_model.create_game import create_segments
+from game_model.routing import AstarRouter, LandmarkRouter
+from scenarios.scenarios import grid_scenario
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[4, 8, 16, 32],
+                        help="Number of horizontal and vertical roads of each grid (even numbers)")
+    parser.add_argument("--landmarks", type=int, nargs="+", default=[4, 8, 16], help="Numbers of landmarks")
+    parser.add_argument("--pairs", type=int, default=200, help="Number of (start, goal) pairs per grid")
+    parser.add_argument("--seed", type=int, default=0, help="Seed used to sample the pairs")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'grid':<8}{'segments':>9}{'router':>12}{'build ms':>10}{'expanded':>10}{'per query':>11}"
+          f"{'query ms':>10}{'mismatch':>10}")
+    for size in args.sizes:
+        segments, intersections = create_segments(grid_scenario(size, size)["roads"])
+        network = CompiledNetwork(segments, intersections)
+        lane_ids = network.lane_segment_ids().tolist()
+        queries = [(rng.randrange(len(network)), rng.choice(lane_ids)) for _ in range(args.pairs)]
+
+        reference = None
+        for landmarks in [0] + args.landmarks:
+            start_time = time.perf_counter()
+            router = AstarRouter(network) if landmarks == 0 else LandmarkRouter(network, landmarks)
+            build_time = time.perf_counter() - start_time
+
+            start_time = time.perf_counter()
+            paths = [router.search(start, goal) for start, goal in queries]
+            query_time = time.perf_counter() - start_time
+            costs = [sum(network.length[path[:-1]]) if path is not None else None for path in paths]
+            if reference is None:
+                reference = costs
+            mismatches = sum(cost != reference_cost for cost, reference_cost in zip(costs, reference))
+
+            name = "euclid" if landmarks == 0 else f"alt-{landmarks}"
+            print(f"{f'{size}x{size}':<8}{len(network):>9}{name:>12}{1000 * build_time:>10.1f}"
+                  f"{router.expanded_nodes:>10}{router.expanded_nodes / args.pairs:>11.1f}"
+                  f"{1000 * query_time:>10.1f}{mismatches:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Measures the memory of the road network and the cars of a scenario with tracemalloc.
+
+The roads of the scenario are copied and split into segments, then random cars with their goals are placed on
+them, and finally many reservation entries (SegmentInfo) and points are allocated on their own. For each step the
+traced allocations are divided by the number of objects created, so the numbers include everything the objects
+own, e.g. the reservation list, goals and position of a car or the lanes and crossing tables of a segment.
+
+Run from the repository root:
+    python -m benchmarks.memory_benchmark [--scenario BIG_SCENARIO] [--players 80] [--count 100000]
+"""
+import argparse
+import contextlib
+import copy
+import io
+import random
+import tracemalloc
+from typing import Callable, Tuple, TypeVar
+
+from game_model.create_game import create_segments
+from game_model.helper_functions import create_random_car
+from game_model.road_network import Direction, Goal, LaneSegment, Point, SegmentInfo
+from scenarios import scenarios
+
+T = TypeVar("T")
+
+
+def traced(create: Callable[[], T]) -> Tuple[T, int]:
+    """
+    Call a function and measure the memory it allocated and kept.
+
+    Args:
+        create (Callable[[], T]): The function.
+
+    Returns:
+        Tuple[T, int]: The result of the function and the number of bytes still allocated after it returned.
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = create()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", default="BIG_SCENARIO", help="Name of the scenario in scenarios/scenarios.py")
+    parser.add_argument("--players", type=int, default=80, help="Number of cars")
+    parser.add_argument("--count", type=int, default=100000, help="Number of SegmentInfo and Point objects")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    roads = getattr(scenarios, args.scenario)["roads"]
+    (segments, _), network_bytes = traced(lambda: create_segments(copy.deepcopy(roads)))
+    lane_segments = [segment for segment in segments if isinstance(segment, LaneSegment)]
+    players = min(args.players, len(lane_segments))
+
+    def create_cars():
+        rng = random.Random(args.seed)
+        cars = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(players):
+                car = create_random_car(segments, cars, rng=rng)
+                car.goal = Goal(rng.choice(lane_segments), car.color)
+                car.second_goal = Goal(rng.choice(lane_segments), car.color)
+                cars.append(car)
+        return cars
+
+    cars, car_bytes = traced(create_cars)
+    seg_infos, seg_info_bytes = traced(lambda: [SegmentInfo(segments[i % len(segments)], 0, i, Direction.RIGHT)
+                                                for i in range(args.count)])
+    points, point_bytes = traced(lambda: [Point(i, i) for i in range(args.count)])
+
+    print(f"{args.scenario}: {len(segments)} segments, {len(cars)} cars")
+    print(f"{'object':<14}{'bytes':>10}")
+    for name, size in (("segment", network_bytes / len(segments)), ("car", car_bytes / len(cars)),
+                       ("SegmentInfo", seg_info_bytes / len(seg_infos)), ("Point", point_bytes / len(points))):
+        print(f"{name:<14}{size:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
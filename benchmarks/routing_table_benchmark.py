@@ -0,0 +1,53 @@
+"""
+Reports what the precomputed RoutingTable costs and saves on every map in scenarios/scenarios.py.
+
+For each map the table is built once (build time and memory are reported), then a fixed sample of
+(start segment, goal lane segment) pairs is routed with the table and with the A* search of Car.astar.
+Both must return paths of the same cost.
+
+Run from the repository root:
+    python -m benchmarks.routing_table_benchmark [--pairs 500] [--seed 0]
+"""
+import argparse
+import copy
+import random
+import time
+
+from benchmarks.astar_benchmark import load_scenarios, path_cost
+from game_model.compiled_network import CompiledNetwork
+from game_model.create_game import create_segments
+from game_model.road_network import LaneSegment
+from game_model.routing import RoutingTable, astar_search
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pairs", type=int, default=500, help="Number of (start, goal) pairs per scenario")
+    parser.add_argument("--seed", type=int, default=0, help="Seed used to sample the pairs")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'scenario':<24}{'segments':>9}{'build ms':>10}{'memory KiB':>12}"
+          f"{'astar ms':>10}{'table ms':>10}{'speedup':>9}{'mismatch':>10}")
+    for name, scenario in load_scenarios().items():
+        segments, intersections = create_segments(copy.deepcopy(scenario["roads"]))
+        lane_segments = [seg for seg in segments if isinstance(seg, LaneSegment)]
+        queries = [(rng.choice(segments), rng.choice(lane_segments)) for _ in range(args.pairs)]
+
+        table = RoutingTable(CompiledNetwork(segments, intersections))
+
+        start_time = time.perf_counter()
+        astar_costs = [path_cost(astar_search(start_seg, goal_seg)[0]) for start_seg, goal_seg in queries]
+        astar_time = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        table_costs = [path_cost(table.route(start_seg, goal_seg)) for start_seg, goal_seg in queries]
+        table_time = time.perf_counter() - start_time
+
+        mismatches = sum(astar_cost != table_cost for astar_cost, table_cost in zip(astar_costs, table_costs))
+        print(f"{name:<24}{len(segments):>9}{1000 * table.build_time:>10.1f}{table.memory / 1024:>12.1f}"
+              f"{1000 * astar_time:>10.1f}{1000 * table_time:>10.1f}{astar_time / table_time:>8.1f}x{mismatches:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Measures sleeping cars: the time per tick of a congested scenario with and without TrafficEnv(sleep=True).
+
+Both runs start from the same seed and must produce the same trajectories, which is checked before the timings
+are printed. The number of decisions skipped for sleeping cars shows how much of the fleet was waiting.
+
+Run from the repository root:
+    python -m benchmarks.sleep_benchmark [--scenario BIG_SCENARIO] [--players 60] [--ticks 1000] [--two-phase]
+"""
+import argparse
+import contextlib
+import copy
+import io
+import random
+import time
+from typing import List, Tuple
+
+from game_model.game_model import TrafficEnv
+from scenarios import scenarios
+
+
+def run(roads: list, players: int, ticks: int, seed: int, **kwargs) -> Tuple[float, int, List[tuple]]:
+    """
+    Run the environment for a number of ticks.
+
+    Args:
+        roads (list): The roads of the scenario, copied for the run.
+        players (int): The number of players.
+        ticks (int): The number of calls to play_step.
+        seed (int): The random seed.
+        **kwargs: Passed on to TrafficEnv.
+
+    Returns:
+        Tuple[float, int, List[tuple]]: The wall time, the number of skipped decisions and the trace of the car states.
+    """
+    random.seed(seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        env = TrafficEnv(roads=copy.deepcopy(roads), players=players, seed=seed, **kwargs)
+        trace = []
+        start_time = time.perf_counter()
+        for _ in range(ticks):
+            game_over = env.play_step()
+            trace.append(tuple((car.name, car.loc, car.speed, car.dead, car.score, car.res[0].segment.id)
+                               for car in env.cars))
+            if game_over:
+                break
+        wall_time = time.perf_counter() - start_time
+    return wall_time, env.skipped_decisions, trace
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", default="BIG_SCENARIO", help="Name of the scenario in scenarios/scenarios.py")
+    parser.add_argument("--players", type=int, default=60, help="Number of players")
+    parser.add_argument("--ticks", type=int, default=1000, help="Number of ticks")
+    parser.add_argument("--two-phase", action="store_true", help="Decide all actions before applying them")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    roads = getattr(scenarios, args.scenario)["roads"]
+    awake_time, _, awake_trace = run(roads, args.players, args.ticks, args.seed, two_phase=args.two_phase)
+    sleep_time, skipped, sleep_trace = run(roads, args.players, args.ticks, args.seed, two_phase=args.two_phase,
+                                           sleep=True)
+    decisions = sum(sum(not state[3] for state in tick) for tick in awake_trace)
+    print(f"{args.scenario}, {args.players} players, {len(awake_trace)} ticks: "
+          f"{'same' if awake_trace == sleep_trace else 'DIFFERENT'} trajectories, "
+          f"{skipped} of about {decisions} decisions skipped")
+    print(f"{'mode':<8}{'ms/tick':>10}")
+    for name, wall_time in (("awake", awake_time), ("sleep", sleep_time)):
+        print(f"{name:<8}{1000 * wall_time / len(awake_trace):>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Measures TrafficEnv.snapshot and TrafficEnv.restore against copying the whole environment with copy.deepcopy.
+
+A scenario is run for a number of warm-up ticks, then a snapshot is taken and the environment runs a rollout of
+a few ticks. After restoring the snapshot the same rollout must produce the same trace, which is checked before
+the timings are printed.
+
+Run from the repository root:
+    python -m benchmarks.snapshot_benchmark [--scenario BIG_SCENARIO] [--players 40] [--warmup 50] [--rollout 20]
+"""
+import argparse
+import contextlib
+import copy
+import io
+import random
+import sys
+import time
+from typing import List
+
+from game_model.game_model import TrafficEnv
+from scenarios import scenarios
+
+
+def rollout(env: TrafficEnv, ticks: int) -> List[tuple]:
+    """
+    Run the environment for a number of ticks.
+
+    Args:
+        env (TrafficEnv): The environment.
+        ticks (int): The number of calls to play_step.
+
+    Returns:
+        List[tuple]: The trace of the car states.
+    """
+    trace = []
+    for _ in range(ticks):
+        game_over = env.play_step()
+        trace.append(tuple((car.name, car.loc, car.speed, car.dead, car.score, car.res[0].segment.id,
+                            car.goal.lane_segment.id) for car in env.cars))
+        if game_over:
+            break
+    return trace
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", default="BIG_SCENARIO", help="Name of the scenario in scenarios/scenarios.py")
+    parser.add_argument("--players", type=int, default=None, help="Number of players (default: the scenario's)")
+    parser.add_argument("--routing", default="astar", help="Routing backend of TrafficEnv")
+    parser.add_argument("--warmup", type=int, default=50, help="Ticks before the snapshot")
+    parser.add_argument("--rollout", type=int, default=20, help="Ticks of the rollout after the snapshot")
+    parser.add_argument("--repeat", type=int, default=1000, help="Number of timed snapshots and restores")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    scenario = getattr(scenarios, args.scenario)
+    players = scenario["players"] if args.players is None else args.players
+    random.seed(args.seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        env = TrafficEnv(roads=copy.deepcopy(scenario["roads"]), players=players, routing=args.routing,
+                         seed=args.seed)
+        rollout(env, args.warmup)
+        snapshot = env.snapshot()
+        first = rollout(env, args.rollout)
+        env.restore(snapshot)
+        second = rollout(env, args.rollout)
+    print(f"{args.scenario}, {players} players, rollout of {args.rollout} ticks after restore: "
+          f"{'same' if first == second else 'DIFFERENT'}")
+
+    start_time = time.perf_counter()
+    for _ in range(args.repeat):
+        snapshot = env.snapshot()
+    snapshot_time = (time.perf_counter() - start_time) / args.repeat
+
+    start_time = time.perf_counter()
+    for _ in range(args.repeat):
+        env.restore(snapshot)
+    restore_time = (time.perf_counter() - start_time) / args.repeat
+
+    # The segments link to each other, deepcopy recurses along those links
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 100000))
+    deepcopy_repeat = max(1, args.repeat // 100)
+    start_time = time.perf_counter()
+    for _ in range(deepcopy_repeat):
+        copy.deepcopy(env)
+    deepcopy_time = (time.perf_counter() - start_time) / deepcopy_repeat
+
+    print(f"{'operation':<12}{'us':>10}{'per second':>12}")
+    for name, seconds in (("snapshot", snapshot_time), ("restore", restore_time), ("deepcopy", deepcopy_time)):
+        print(f"{name:<12}{1e6 * seconds:>10.1f}{1 / seconds:>12.0f}")
+
+
+if __name__ == '__main__':
+    main()
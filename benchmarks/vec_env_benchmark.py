@@ -0,0 +1,54 @@
+"""
+Measures the throughput of VecTrafficEnv in environment steps per second against the number of environments,
+stepping all environments in one process and spread over worker processes (one per environment, at most one
+per core).
+
+Run from the repository root:
+    python -m benchmarks.vec_env_benchmark [--scenario TWO_CROSSING] [--envs 1 2 4 8] [--steps 100]
+"""
+import argparse
+import contextlib
+import io
+import multiprocessing
+import time
+
+from benchmarks.astar_benchmark import load_scenarios
+from game_model.vec_env import VecTrafficEnv
+
+
+def throughput(scenario: dict, num_envs: int, workers: int, steps: int, max_ticks: int) -> float:
+    """
+    Step a VecTrafficEnv and measure the environment steps per second.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        with VecTrafficEnv(scenario["roads"], scenario["players"], num_envs, max_ticks=max_ticks,
+                           workers=workers) as envs:
+            envs.reset()
+            start_time = time.perf_counter()
+            for _ in range(steps):
+                envs.step()
+            elapsed = time.perf_counter() - start_time
+    return num_envs * steps / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", default="TWO_CROSSING", help="Name of the scenario")
+    parser.add_argument("--envs", type=int, nargs="+", default=[1, 2, 4, 8], help="Numbers of environments")
+    parser.add_argument("--steps", type=int, default=100, help="Steps per run")
+    parser.add_argument("--max-ticks", type=int, default=200, help="Episode length")
+    args = parser.parse_args()
+
+    scenario = load_scenarios()[args.scenario]
+    cores = multiprocessing.cpu_count()
+    print(f"{cores} cores")
+    print(f"{'envs':>5}{'in-process steps/s':>20}{'workers':>9}{'steps/s':>10}")
+    for num_envs in args.envs:
+        workers = min(num_envs, cores)
+        in_process = throughput(scenario, num_envs, 0, args.steps, args.max_ticks)
+        parallel = throughput(scenario, num_envs, workers, args.steps, args.max_ticks)
+        print(f"{num_envs:>5}{in_process:>20.1f}{workers:>9}{parallel:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
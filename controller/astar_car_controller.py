@@ -94,8 +94,19 @@ class AstarCarController:
         if len(segments) == 0:
             return MAX_ACC
 
-        reserved_length = sum([abs(seg_info.end - seg_info.begin) for seg_info in segments])
+        if segments is self.car.res:
+            reserved_length = self.car.reserved_length()
+        else:
+            reserved_length = sum([abs(seg_info.end - seg_info.begin) for seg_info in segments])
         upto_last_seg_reserved_length = reserved_length- abs(segments[-1].end - segments[-1].begin)
+        max_segment_speed = min([seg_info.segment.max_speed for seg_info in segments])
+        # The reserved length before every crossing segment, for Case 0
+        reserved_before = {}
+        reserved_so_far = 0
+        for i, seg_info in enumerate(segments):
+            if isinstance(seg_info.segment, CrossingSegment):
+                reserved_before[i] = reserved_so_far
+            reserved_so_far += abs(seg_info.end - seg_info.begin)
         # limit max_acc to the max speed of the car
         max_acc  = min(MAX_ACC, self.car.max_speed - self.car.speed)
         max_dec = - min(MAX_DEC, self.car.speed)
@@ -106,7 +117,7 @@ class AstarCarController:
             new_speed = self.car.speed + acceleration
 
             # check if car exceeds max speed of the current segment
-            if self.car.speed + acceleration > min([seg_info.segment.max_speed for seg_info in segments]):
+            if self.car.speed + acceleration > max_segment_speed:
                 continue
 
             # check if car is changing lane
@@ -166,22 +177,19 @@ class AstarCarController:
             collision = False
 
             # Case 0: Already in a crossing
-            for i, seg_info in enumerate(segments):
-                seg = seg_info.segment
-                if isinstance(seg, CrossingSegment):
-                    if len(seg.cars) > 1:
-                        # collision = True
-                        # break
-                        time_to_enter = \
-                            math.ceil((sum([abs(seg_info.end - seg_info.begin) 
-                                            for seg_info in segments[0:i]]) / max(new_speed, CROSSING_MAX_SPEED)))
-                        for other_car in seg.cars[0:seg.cars.index(self.car)]:
-                            if new_speed > other_car.speed:
-                                collision = True
-                                break
-                            if  time_to_enter <= seg.time_to_leave[other_car]:
-                                collision = True
-                                break
+            for i, reserved in reserved_before.items():
+                seg = segments[i].segment
+                if len(seg.cars) > 1:
+                    # collision = True
+                    # break
+                    time_to_enter = math.ceil(reserved / max(new_speed, CROSSING_MAX_SPEED))
+                    for other_car in seg.cars[0:seg.cars.index(self.car)]:
+                        if new_speed > other_car.speed:
+                            collision = True
+                            break
+                        if  time_to_enter <= seg.time_to_leave[other_car]:
+                            collision = True
+                            break
 
             # Case 1: Enter a crossing
             if len(added_segments) > 1:
@@ -6,18 +6,25 @@ from game_model.game_model import TrafficEnv
 from game_model.Tester import SimulationTester
 from game_model.car import Car
 from game_model.road_network import Road
+from game_model.routing import RouteCache
 from gui.pyglet_gui import CarsWindow
 
 import pyglet
 
 class GameController:
     def __init__(self, gui: bool, roads: List[Road], players: int, cars: Optional[List[Car]] = None, controllers: Optional[List[AstarCarController]] = None, 
-                 debug: bool = False, test_mode: List[str] = None):
+                 debug: bool = False, test_mode: List[str] = None, routing: str = "astar",
+                 route_cache_size: Optional[int] = None):
         
         self.gui = gui
 
-        self.game: TrafficEnv = TrafficEnv(roads=roads, players=players, cars=cars, controllers=controllers)
+        self.game: TrafficEnv = TrafficEnv(roads=roads, players=players, cars=cars, controllers=controllers, routing=routing,
+                                           route_cache_size=route_cache_size)
         self.game_over: bool = False
+        # Report the build time and memory of a precomputed router, also behind a route cache
+        router = self.game.router.router if isinstance(self.game.router, RouteCache) else self.game.router
+        if getattr(router, "build_time", None) is not None:
+            print(router)
 
         self.debug: bool = debug
         self.test_mode = test_mode
@@ -67,8 +74,7 @@ class GameController:
         self._game_over_state(self.game)
 
     def _check_deadlock(self) -> bool:
-        deadlock = [True if car.speed == 0 else False for car in self.game.cars]
-        if all(deadlock):
+        if self.game.is_deadlocked():
             print("___________________________________________________________________________")
             print("Deadlock between all cars.")
             print("___________________________________________________________________________")
@@ -80,4 +86,9 @@ class GameController:
         print(f"Game Over:")
         for car in game.cars:
             print(f"car {car.name} score {car.score}")
+        calls = sum(car.next_segment_calls for car in game.cars)
+        memo_hits = sum(car.next_segment_memo_hits for car in game.cars)
+        print(f"next segment queries {calls}, searches saved by the per-step memo {memo_hits}")
+        if game.router is not None:
+            print(game.router)
             #Todo: print reason, if car is dead
\ No newline at end of file
@@ -57,7 +57,7 @@ class SimulationTester:
         """
         not_in_lane = 0
 
-        for controller in self.controllers:
+        for controller in self.game_model.active_cars.values():
             car = controller.car
             if not isinstance(car.res[-1].segment, LaneSegment):
                 not_in_lane += 1
@@ -82,7 +82,7 @@ class SimulationTester:
 
         """
         incorrect_priority = 0
-        for controller in self.controllers:
+        for controller in self.game_model.active_cars.values():
             car = controller.car
             priority = car.res[0].segment.cars.index(car)
             if isinstance(car.res[0].segment, LaneSegment):
@@ -112,7 +112,7 @@ class SimulationTester:
         too_short_reservations = 0
         no_correct_reservation_on_last_segment = 0
 
-        for controller in self.controllers:
+        for controller in self.game_model.active_cars.values():
             car = controller.car
             reserved_length = sum([abs(seg_info.end) - abs(seg_info.end) for seg_info in car.res])
 
@@ -145,7 +145,7 @@ class SimulationTester:
         missing_reservations = 0
         additional_reservations = 0
 
-        for controller in self.controllers:
+        for controller in self.game_model.active_cars.values():
             car = controller.car
             for seg_info in car.res:
                 if car not in seg_info.segment.cars:
@@ -1,13 +1,20 @@
 import math
-import numpy as np
 
 from game_model.constants import *
+from game_model.braking import braking_sum
 from game_model.road_network import Color, Goal, Intersection, LaneSegment, SegmentInfo, true_direction, Problem, CrossingSegment, Point, \
     horiz_direction, right_direction, Segment
-from typing import Optional, List, Dict
+from game_model.routing import Router, fifo_search
+from typing import Callable, Optional, List, Dict, Set, Tuple
 
 
 class Car:
+    # batch is set by the GUI
+    __slots__ = ("reserved_segment", "changing_lane", "name", "speed", "size", "color", "_dead", "goal", "second_goal",
+                 "direction", "loc", "max_speed", "claimed_lane", "parallel_res", "lane_change_counter", "time", "score",
+                 "last_loc", "expanded_nodes", "_next_segment_memo", "_next_segment_memo_time", "next_segment_calls",
+                 "next_segment_memo_hits", "router", "listener", "res", "covered_length", "pos", "w", "h", "batch")
+
     def __init__(self,
                  name: str,
                  loc: int,
@@ -46,12 +53,24 @@ class Car:
         self.time: int = 0
         self.score: int = 0
         self.last_loc: Point = loc
+        self.expanded_nodes: int = 0
+        # Per time step memo of get_next_segment, keyed by (start segment, goal segment)
+        self._next_segment_memo: Dict[Tuple[Segment, LaneSegment], List[Segment]] = {}
+        self._next_segment_memo_time: int = -1
+        self.next_segment_calls: int = 0
+        self.next_segment_memo_hits: int = 0
+        # Optional router (e.g. a RoutingTable or RouteCache) shared by all cars of an environment
+        self.router: Optional[Router] = None
+        # Optional callback notified when the car dies
+        self.listener: Optional[Callable[['Car'], None]] = None
 
         self.res: list[SegmentInfo] = [SegmentInfo(segment,
                                                    self.loc, 
                                                    (1 if true_direction[self.direction] else -1) * self.get_braking_distance(),
                                                    self.direction)]
-        segment.cars.append(self)
+        # The sum of the lengths of the reserved segments, kept up to date whenever res changes
+        self.covered_length: int = segment.length
+        segment.add_car(self)
         # self.extend_res()
 
         # For gui only
@@ -67,15 +86,20 @@ class Car:
     
     @dead.setter
     def dead(self, _dead: bool):
+        died = False
         if _dead:
             index = len(self.get_size_segments())
             while index < len(self.res):
-                self.res[index].segment.cars.remove(self)
+                self.res[index].segment.remove_car(self)
+                self.covered_length -= self.res[index].segment.length
                 self.res.remove(self.res[index])
                 index += 1
             self.speed = 0
+            died = not self._dead
 
         self._dead = _dead
+        if died and self.listener is not None:
+            self.listener(self)
 
     def move(self) -> bool:
         """
@@ -102,25 +126,27 @@ class Car:
 
         while abs(self.loc) > self.res[0].segment.length:
             seg_info = self.res.pop(0)
+            self.covered_length -= seg_info.segment.length
             self.loc = (1 if true_direction[self.res[0].direction] else -1) * (abs(self.loc) - seg_info.segment.length)
             if isinstance(seg_info.segment, CrossingSegment):
                 intersection = seg_info.segment.intersection
-                seg_info.segment.time_to_leave.pop(self)
-            seg_info.segment.cars.remove(self)
+                seg_info.segment.pop_time_to_leave(self)
+            seg_info.segment.remove_car(self)
             if self.parallel_res:
                 parallel_seg_info = self.parallel_res.pop(0)
-                parallel_seg_info.segment.cars.remove(self)
+                parallel_seg_info.segment.remove_car(self)
 
         self.res[0].begin = self.loc
 
         if self.parallel_res:
             self.parallel_res[0].begin = self.loc
 
-        for i, seg_info in enumerate(self.res):
+        reserved_length = 0
+        for seg_info in self.res:
+            reserved_length += abs(seg_info.end - seg_info.begin)
             if isinstance(seg_info.segment, CrossingSegment):
-                seg_info.segment.time_to_leave[self] = \
-                    math.ceil(sum([abs(seg.end - seg.begin) for seg in self.res[0:i+1]]) /
-                                      max(1, min(self.speed, CROSSING_MAX_SPEED)))
+                seg_info.segment.set_time_to_leave(
+                    self, math.ceil(reserved_length / max(1, min(self.speed, CROSSING_MAX_SPEED))))
 
         if self.res[0].turn:
             self.res[0].turn = False
@@ -136,8 +162,10 @@ class Car:
                 paral_seg_info.end = (1 if true_direction[paral_seg_info.direction] else -1) * paral_seg_info.segment.length
 
         # Update the "end" of the last reserved segment (last reserved segment is always a lane segment)
-        end = max (self.size, 
-                   self.get_braking_distance() - sum([abs(self.res[i].end - self.res[i].begin) for i in range(len(self.res) - 1)]))
+        # All segments before it are reserved up to their end now
+        upto_last_seg_reserved_length = 0 if len(self.res) == 1 else \
+            self.covered_length - self.res[-1].segment.length - abs(self.res[0].begin)
+        end = max(self.size, self.get_braking_distance() - upto_last_seg_reserved_length)
         
         self.res[-1].end = (1 if true_direction[self.res[-1].direction] else -1) * (end + abs(self.res[-1].begin))
         if self.parallel_res:
@@ -150,50 +178,82 @@ class Car:
     def get_next_segment(self, last_seg: Segment = None) -> List[Segment]:
         """
         Get the next segment for the car to move to.
+        The result only depends on the start segment and the goal, so it is memoized for the current time step:
+        a single decision routes at most once per distinct start segment.
 
         Args:
-            last_seg (dict, optional): The last segment the car was on. Defaults to None.
-            direction (int, optional): The direction the car is moving. Defaults to None.
+            last_seg (Segment, optional): The segment to route from. Defaults to the last reserved segment.
 
         Returns:
              List[Segment]: The next segments for the car to move to, up to the next Lanesegment
         """
-        if last_seg is None:
-            last_seg_info = self.res[-1].segment
-
         if self.res[0].segment == self.goal.lane_segment:
             #case 1: cur seg == goal seg -> preplan path to second goal
-            # segs = self.astar()
-            segs = self.astar(goal=self.second_goal)
-
+            start_seg, goal = self.res[-1].segment, self.second_goal
         else:
             #case 2: cur seg != goal seg -> plan path to first goal(e.g. for alternative lanes (right, left)
-            segs = self.astar(last_seg)
-        
+            start_seg, goal = self.res[-1].segment if last_seg is None else last_seg, self.goal
+
+        if self._next_segment_memo_time != self.time:
+            self._next_segment_memo.clear()
+            self._next_segment_memo_time = self.time
+        self.next_segment_calls += 1
+        key = (start_seg, goal.lane_segment)
+        if key in self._next_segment_memo:
+            self.next_segment_memo_hits += 1
+            return list(self._next_segment_memo[key])
 
+        segs = self.astar(start_seg, goal)
 
         if len(segs) == 0:
             print("Astar Error: No segments found by the astar function.")
 
+        next_segs = []
         if len(segs) == 1:
-            return segs
+            next_segs = segs
+        else:
+            for i in range(1, len(segs)):
+                if isinstance(segs[i], LaneSegment):
+                    next_segs = segs[0:i + 1]
+                    break
+
+        self._next_segment_memo[key] = next_segs
+        return list(next_segs)
+
+    def routed_segments(self) -> Set[Segment]:
+        """
+        Get the segments returned by get_next_segment in the current time step, i.e. the segments ahead a decision
+        of this time step looked at.
+
+        Returns:
+            Set[Segment]: The segments.
+        """
+        if self._next_segment_memo_time != self.time:
+            return set()
+        return {segment for next_segs in self._next_segment_memo.values() for segment in next_segs}
 
-        i = 1
+    def reserved_length(self) -> int:
+        """
+        Get the length of the reservation, the sum of abs(end - begin) over res, in constant time.
 
-        for i in range(1, len(segs)):
-            if isinstance(segs[i], LaneSegment):
-                return segs[0:i + 1]
+        Between moves only the first reserved segment starts after its beginning (at loc) and only the last one
+        ends before its end, so the reservation covers all segments except those two parts.
 
-        return []
+        Returns:
+            int: The reserved length.
+        """
+        first, last = self.res[0], self.res[-1]
+        if len(self.res) == 1:
+            return abs(last.end - last.begin)
+        return self.covered_length - last.segment.length + abs(last.end) - abs(first.begin)
 
     def extend_res(self) -> bool:
         """
         Extend the reservation of the car to the next segments.
         """
         breaking_distance = self.get_braking_distance()
-        reserved_length = sum([abs(seg_info.end - seg_info.begin) for seg_info in self.res])
-        if abs(self.loc) + breaking_distance >= sum([seg_info.segment.length for seg_info in self.res]):
-            breaking_distance -= reserved_length 
+        if abs(self.loc) + breaking_distance >= self.covered_length:
+            reserved_length = self.reserved_length()
             next_segs = self.astar()
             if len(next_segs) < 2:
                 next_segs = self.astar(goal=self.second_goal)
@@ -212,7 +272,7 @@ class Car:
             if self in next_segs[0].intersection.priority:
                 next_segs[0].intersection.priority.pop(self)
             for i, next_seg in enumerate(next_segs):
-                extra = abs(self.loc) + self.get_braking_distance() - sum([seg_info.segment.length for seg_info in self.res])
+                extra = abs(self.loc) + breaking_distance - self.covered_length
                 next_dir = None
                 if isinstance(next_seg, LaneSegment):
                     next_dir = next_seg.lane.direction
@@ -232,11 +292,12 @@ class Car:
                                             next_dir != self.res[-1].direction)
                 
                 self.res.append(next_seg_info)
-                next_seg.cars.append(self)
+                self.covered_length += next_seg.length
+                reserved_length += abs(next_seg_info.end - next_seg_info.begin)
+                next_seg.add_car(self)
                 if isinstance(next_seg, CrossingSegment):
-                    next_seg.time_to_leave[self] = \
-                        math.ceil(sum([abs(seg_info.end - seg_info.begin) for seg_info in self.res]) / 
-                                    max(1, min(self.speed, CROSSING_MAX_SPEED)))
+                    next_seg.set_time_to_leave(
+                        self, math.ceil(reserved_length / max(1, min(self.speed, CROSSING_MAX_SPEED))))
 
 
 
@@ -341,14 +402,15 @@ class Car:
         if self.time - self.reserved_segment[0] == LANECHANGE_TIME_STEPS:
             self.changing_lane = False
             for seg_info in self.res:
-                seg_info.segment.cars.remove(self)
+                seg_info.segment.remove_car(self)
             self.res = [
                 SegmentInfo(self.reserved_segment[1],
                             self.res[0].begin,
                             self.res[0].end,
                             self.res[0].direction)
             ]
-            self.res[0].segment.cars.append(self)
+            self.covered_length = self.res[0].segment.length
+            self.res[0].segment.add_car(self)
             self.extend_res()
             self._update_position()
             return True
@@ -425,12 +487,7 @@ class Car:
         if speed is None:
             speed = self.speed
         assert speed >= 0, f"Speed must be positive {self.name} - {speed}"
-        # braking = math.ceil(speed**2  // (2 * MAX_DEC))
-
-        braking = 0
-        while speed > 0:
-            braking += speed
-            speed -= MAX_DEC
+        braking = braking_sum(speed)
         # BLOCK_SIZE // 2 additional distance when speed = 0
         return self.size + braking + BUFFER
     
@@ -460,113 +517,21 @@ class Car:
 
     def astar(self, start_seg:Segment = None, goal:Goal = None) -> Optional[List[Segment]]:
         """
-        Perform the A* search algorithm to find the shortest path from the car's current segment to the goal segment.
+        Search a path from the car's current segment to the goal segment with fifo_search, in the order this search
+        has always expanded the segments. The number of segments expanded by the search is added to the car's
+        expanded_nodes counter. If the car has a router, the path is looked up there instead of searched.
+
+        Args:
+            start_seg (Segment, optional): The segment to start from. Defaults to the last reserved segment.
+            goal (Goal, optional): The goal to route to. Defaults to the car's goal.
 
         Returns:
             Optional[List[Segment]]: The list of segments representing the shortest path from the current segment to the goal segment, or None if no path is found.
         """
-
-        def dist(p1: Point, p2: Point) -> float:
-            """
-            Calculate the Euclidean distance between two points.
-
-            Args:
-                p1 (Point): The first point.
-                p2 (Point): The second point.
-
-            Returns:
-                float: The Euclidean distance between the two points.
-            """
-            return np.linalg.norm([p1.x - p2.x, p1.y - p2.y])
-
-        def astar_heuristic(current_seg: Segment, goal_seg: LaneSegment) -> float:
-            """
-            Calculate the heuristic distance between the current segment and the goal segment for the A* algorithm.
-
-            Args:
-                current_seg (Segment): The current segment the car is on.
-                goal_seg (LaneSegment): The goal segment the car is trying to reach.
-
-            Returns:
-                float: The heuristic distance between the current segment and the goal segment.
-            """
-            match current_seg:
-                case LaneSegment():
-                    if goal_seg.lane.road.horizontal:
-                        if current_seg.lane.road.horizontal:
-                            return dist(Point(current_seg.end, current_seg.lane.top),
-                                        Point(goal_seg.begin, goal_seg.lane.top))
-                        else:
-                            return dist(Point(current_seg.lane.top, current_seg.end),
-                                        Point(goal_seg.begin, goal_seg.lane.top))
-                    else:
-                        if current_seg.lane.road.horizontal:
-                            return dist(Point(current_seg.end, current_seg.lane.top),
-                                        Point(goal_seg.lane.top, goal_seg.begin))
-                        else:
-                            return dist(Point(current_seg.lane.top, current_seg.end),
-                                        Point(goal_seg.lane.top, goal_seg.begin))
-                case CrossingSegment():
-                    if goal_seg.lane.road.horizontal:
-                        return dist(Point(current_seg.horiz_lane.top + MID_LANE, current_seg.vert_lane.top + MID_LANE),
-                                    Point(goal_seg.begin, goal_seg.lane.top))
-                    else:
-                        return dist(Point(current_seg.horiz_lane.top + MID_LANE, current_seg.vert_lane.top + MID_LANE),
-                                    Point(goal_seg.lane.top, goal_seg.begin))
-
-        def reconstruct_path(came_from_list: Dict[Segment, Segment], current: LaneSegment) -> List[Segment]:
-            """
-            Reconstruct the path from the start segment to the goal segment using the came_from map.
-
-            Args:
-                came_from_list (Dict[Segment, Segment]): A dictionary mapping each segment to the segment it came from.
-                current (LaneSegment): The current segment (goal segment).
-
-            Returns:
-                List[Segment]: The reconstructed path from the start segment to the goal segment.
-            """
-            path: list[Segment] = [current]
-            while current in came_from_list:
-                current = came_from_list[current]
-                path.insert(0, current)
-            return path
-
         start_seg = self.res[-1].segment if start_seg is None else start_seg
         goal_seg = self.goal.lane_segment if goal is None else goal.lane_segment
-        # Initialize the open list with the start node and a cost of 0
-        open_list = [(0, start_seg)]
-        # Initialize the came_from dictionary to track the path
-        came_from: dict[Segment, Segment] = {}
-        # Initialize the g_score dictionary to store the cost from start to each node
-        g_score = {start_seg: 0}
-        # Initialize the f_score dictionary to store the total estimated cost from start to goal
-        f_score = {start_seg: astar_heuristic(start_seg, goal_seg)}  # Replace with your heuristic function
-        while open_list:
-            _, current_seg = open_list.pop(0)
-
-            if current_seg == goal_seg:
-                return reconstruct_path(came_from, current_seg)
-
-            neighbors = []
-            match current_seg:
-                case LaneSegment():
-                    neighbors = [current_seg.end_crossing] if current_seg.end_crossing is not None else []
-                case CrossingSegment():
-                    neighbors = [seg for seg in
-                                 current_seg.connected_segments.values()
-                                 if seg is not None]
-
-            for neighbor in neighbors:
-                if neighbor not in g_score:
-                    g_score[neighbor] = float('inf')
-                    f_score[neighbor] = float('inf')
-                tentative_g_score = g_score[current_seg] + current_seg.length
-
-                if tentative_g_score < g_score[neighbor]:
-                    came_from[neighbor] = current_seg
-                    g_score[neighbor] = tentative_g_score
-                    f_score[neighbor] = g_score[neighbor] + astar_heuristic(neighbor, goal_seg)
-                    open_list.append((f_score[neighbor], neighbor))
-
-        return None  # No path found
-
+        if self.router is not None:
+            return self.router.route(start_seg, goal_seg)
+        path, expanded = fifo_search(start_seg, goal_seg)
+        self.expanded_nodes += expanded
+        return path
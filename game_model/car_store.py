@@ -0,0 +1,264 @@
+from typing import List, Optional
+
+import numpy as np
+
+from game_model.car import Car
+from game_model.braking import braking_distances
+from game_model.road_network import Color, Direction, LaneSegment
+
+
+class CarStore:
+    """
+    A columnar (struct-of-arrays) store of the scalar state of many cars.
+
+    Every car added to the store is a CarView over one row of the columns, so per-car code keeps working on
+    the car objects while fleet-wide operations such as speed changes, braking distances and position updates
+    run on whole columns at once. Rows are never removed; reset clears the store and invalidates the CarViews
+    created before.
+
+    Attributes:
+        cars (List[CarView]): The car of every row.
+        generation (int): The number of resets, CarViews of an earlier generation refuse to be used.
+        speed, loc, size, max_speed, score (np.ndarray): The integer state of every car.
+        dead (np.ndarray): True for dead cars.
+        segment (np.ndarray): The id of the segment the car is on (res[0]), updated after every move.
+        direction (np.ndarray): The Direction value of every car.
+    """
+
+    _INT_COLUMNS = ("speed", "loc", "size", "max_speed", "score", "segment")
+
+    def __init__(self, capacity: int = 64) -> None:
+        """
+        Initialize an empty CarStore.
+
+        Args:
+            capacity (int): The number of rows allocated up front. The columns grow when needed.
+        """
+        self.cars: List['CarView'] = []
+        self.generation = 0
+        self._capacity = max(1, capacity)
+        self._columns = {name: np.zeros(self._capacity, dtype=np.int64) for name in self._INT_COLUMNS}
+        self._columns["dead"] = np.zeros(self._capacity, dtype=bool)
+        self._columns["direction"] = np.zeros(self._capacity, dtype=np.int8)
+
+    def __len__(self) -> int:
+        return len(self.cars)
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Get the full (allocated) column, for scalar access by row.
+        """
+        return self._columns[name]
+
+    @property
+    def speed(self) -> np.ndarray:
+        return self._columns["speed"][:len(self.cars)]
+
+    @property
+    def loc(self) -> np.ndarray:
+        return self._columns["loc"][:len(self.cars)]
+
+    @property
+    def size(self) -> np.ndarray:
+        return self._columns["size"][:len(self.cars)]
+
+    @property
+    def max_speed(self) -> np.ndarray:
+        return self._columns["max_speed"][:len(self.cars)]
+
+    @property
+    def score(self) -> np.ndarray:
+        return self._columns["score"][:len(self.cars)]
+
+    @property
+    def segment(self) -> np.ndarray:
+        return self._columns["segment"][:len(self.cars)]
+
+    @property
+    def dead(self) -> np.ndarray:
+        return self._columns["dead"][:len(self.cars)]
+
+    @property
+    def direction(self) -> np.ndarray:
+        return self._columns["direction"][:len(self.cars)]
+
+    def add_row(self, car: 'CarView') -> int:
+        """
+        Allocate the row of a new car, growing the columns if needed.
+
+        Args:
+            car (CarView): The car.
+
+        Returns:
+            int: The row of the car.
+        """
+        if len(self.cars) == self._capacity:
+            self._capacity *= 2
+            for name, column in self._columns.items():
+                grown = np.zeros(self._capacity, dtype=column.dtype)
+                grown[:len(column)] = column
+                self._columns[name] = grown
+        self.cars.append(car)
+        return len(self.cars) - 1
+
+    def reset(self) -> None:
+        """
+        Remove all cars from the store. The rows are reused by the next cars, so the CarViews of the removed cars
+        are invalidated.
+        """
+        self.cars = []
+        self.generation += 1
+        for column in self._columns.values():
+            column[:] = 0
+
+    def change_speed(self, speed_diff: np.ndarray) -> None:
+        """
+        Change the speed of every car, as Car.change_speed does for one car.
+
+        Args:
+            speed_diff (np.ndarray): The difference in speed of every car (or one value for all cars).
+        """
+        np.clip(self.speed + speed_diff, 0, self.max_speed, out=self.speed)
+
+    def braking_distance(self, speed: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Get the braking distance of every car, as Car.get_braking_distance does for one car.
+
+        Args:
+            speed (Optional[np.ndarray]): The speed of every car. Defaults to the current speeds.
+
+        Returns:
+            np.ndarray: The braking distance of every car. Dead cars get their speed, like in Car.
+        """
+        if speed is None:
+            speed = self.speed
+        return np.where(self.dead, self.speed, braking_distances(speed, self.size))
+
+    def advance(self, rows: np.ndarray) -> None:
+        """
+        Move cars along their current segment by their speed, without touching their reservations.
+        The caller is responsible for only passing cars that stay on their segment.
+
+        Args:
+            rows (np.ndarray): The rows (or a boolean mask) of the cars to move.
+        """
+        direction = self.direction[rows]
+        forward = (direction == Direction.RIGHT.value) | (direction == Direction.UP.value)
+        self.loc[rows] += np.where(forward, 1, -1) * self.speed[rows]
+
+
+class CarView(Car):
+    """
+    A Car whose scalar state lives in one row of a CarStore.
+
+    The attributes speed, loc, size, max_speed, score, dead and direction are read from and written to the
+    columns of the store, and the segment column is updated after every move. Everything else behaves exactly
+    like Car. After the store was reset, reading or writing these attributes raises a RuntimeError, since the row
+    may already belong to another car.
+    """
+
+    __slots__ = ("_store", "_row", "_generation")
+
+    def __init__(self,
+                 store: CarStore,
+                 name: str,
+                 loc: int,
+                 segment: LaneSegment,
+                 speed: int,
+                 size: int,
+                 color: Color,
+                 max_speed: int) -> None:
+        """
+        Initialize a CarView and its row in the store.
+
+        Args:
+            store (CarStore): The store holding the state of the car.
+            name (str): The name of the car.
+            loc (int): The initial location of the car.
+            segment (LaneSegment): The initial lane segment the car is on.
+            speed (int): The initial speed of the car.
+            size (int): The size of the car.
+            color (Color): The color of the car.
+            max_speed (int): The maximum speed of the car.
+        """
+        self._store = store
+        self._generation = store.generation
+        self._row = store.add_row(self)
+        super().__init__(name, loc, segment, speed, size, color, max_speed)
+        store.column("segment")[self._row] = segment.id
+
+    @property
+    def row(self) -> int:
+        """
+        The row of the car in the store.
+        """
+        return self._row
+
+    def _column(self, name: str) -> np.ndarray:
+        """
+        Get a column of the store, after checking that the store was not reset since the car was created.
+        """
+        if self._generation != self._store.generation:
+            raise RuntimeError(f"Car {self.name} belongs to a CarStore that was reset")
+        return self._store.column(name)
+
+    @property
+    def speed(self) -> int:
+        return int(self._column("speed")[self._row])
+
+    @speed.setter
+    def speed(self, speed: int) -> None:
+        self._column("speed")[self._row] = speed
+
+    @property
+    def loc(self) -> int:
+        return int(self._column("loc")[self._row])
+
+    @loc.setter
+    def loc(self, loc: int) -> None:
+        self._column("loc")[self._row] = loc
+
+    @property
+    def size(self) -> int:
+        return int(self._column("size")[self._row])
+
+    @size.setter
+    def size(self, size: int) -> None:
+        self._column("size")[self._row] = size
+
+    @property
+    def max_speed(self) -> int:
+        return int(self._column("max_speed")[self._row])
+
+    @max_speed.setter
+    def max_speed(self, max_speed: int) -> None:
+        self._column("max_speed")[self._row] = max_speed
+
+    @property
+    def score(self) -> int:
+        return int(self._column("score")[self._row])
+
+    @score.setter
+    def score(self, score: int) -> None:
+        self._column("score")[self._row] = score
+
+    @property
+    def _dead(self) -> bool:
+        return bool(self._column("dead")[self._row])
+
+    @_dead.setter
+    def _dead(self, dead: bool) -> None:
+        self._column("dead")[self._row] = dead
+
+    @property
+    def direction(self) -> Direction:
+        return Direction(int(self._column("direction")[self._row]))
+
+    @direction.setter
+    def direction(self, direction: Direction) -> None:
+        self._column("direction")[self._row] = direction.value
+
+    def move(self) -> bool:
+        moved = super().move()
+        self._column("segment")[self._row] = self.res[0].segment.id
+        return moved
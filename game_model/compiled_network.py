@@ -0,0 +1,199 @@
+import copy
+from functools import cached_property
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from game_model.constants import MID_LANE
+from game_model.road_network import CrossingSegment, Direction, Intersection, LaneSegment, Segment
+
+
+class CompiledNetwork:
+    """
+    A compiled, integer-indexed form of a road network created by create_segments.
+
+    Segment i of the network is segments[i] (and segments[i].id == i). The directed segment graph is stored as
+    CSR arrays: the successors of segment i are indices[indptr[i]:indptr[i + 1]], and edge k leaves its segment
+    in direction edge_direction[k]. The predecessors are stored the same way in reverse_indptr and
+    reverse_indices. Routing, heuristics and analytics can run on these flat arrays and map their results back
+    to the segment objects.
+
+    Attributes:
+        segments (List[Segment]): The segment object of each segment id.
+        intersections (List[Intersection]): The intersections of the network.
+        is_crossing (np.ndarray): True for crossing segments.
+        length (np.ndarray): The length of each segment.
+        max_speed (np.ndarray): The maximum speed of each segment.
+        direction (np.ndarray): The Direction value of each lane segment, 0 for crossing segments.
+        begin_x, begin_y, end_x, end_y (np.ndarray): The coordinates where a car enters and leaves each segment,
+            on the center line of its lane. Both are the center of the crossing for crossing segments.
+        indptr, indices (np.ndarray): The successors of each segment in CSR form.
+        edge_direction (np.ndarray): The Direction value in which each edge leaves its segment.
+        reverse_indptr, reverse_indices (np.ndarray): The predecessors of each segment in CSR form.
+    """
+
+    def __init__(self, segments: List[Segment], intersections: Optional[List[Intersection]] = None) -> None:
+        """
+        Compile the segments created by create_segments.
+
+        Args:
+            segments (List[Segment]): The segments created by create_segments, with their ids assigned.
+            intersections (Optional[List[Intersection]]): The intersections created by create_segments.
+        """
+        self.segments: List[Segment] = list(segments)
+        self.intersections: List[Intersection] = list(intersections) if intersections is not None else []
+        for i, segment in enumerate(self.segments):
+            if segment.id != i:
+                raise ValueError(f"Segment {segment} has id {segment.id}, expected {i}")
+
+        n = len(self.segments)
+        self.is_crossing: np.ndarray = np.array([isinstance(seg, CrossingSegment) for seg in self.segments],
+                                                dtype=bool)
+        self.length: np.ndarray = np.array([seg.length for seg in self.segments], dtype=np.int32)
+        self.max_speed: np.ndarray = np.array([seg.max_speed for seg in self.segments], dtype=np.int32)
+        self.direction: np.ndarray = np.array([seg.lane.direction.value if isinstance(seg, LaneSegment) else 0
+                                               for seg in self.segments], dtype=np.int8)
+
+        coordinates = np.array([self._coordinates(seg) for seg in self.segments], dtype=np.int32).reshape(n, 4)
+        self.begin_x: np.ndarray = coordinates[:, 0]
+        self.begin_y: np.ndarray = coordinates[:, 1]
+        self.end_x: np.ndarray = coordinates[:, 2]
+        self.end_y: np.ndarray = coordinates[:, 3]
+
+        indptr = [0]
+        indices = []
+        edge_direction = []
+        for seg in self.segments:
+            if isinstance(seg, LaneSegment):
+                if seg.end_crossing is not None:
+                    indices.append(seg.end_crossing.id)
+                    edge_direction.append(seg.lane.direction.value)
+            else:
+                for direction, next_seg in seg.connected_segments.items():
+                    if next_seg is not None:
+                        indices.append(next_seg.id)
+                        edge_direction.append(direction.value)
+            indptr.append(len(indices))
+        self.indptr: np.ndarray = np.array(indptr, dtype=np.int32)
+        self.indices: np.ndarray = np.array(indices, dtype=np.int32)
+        self.edge_direction: np.ndarray = np.array(edge_direction, dtype=np.int8)
+
+        sources = np.repeat(np.arange(n, dtype=np.int32), np.diff(self.indptr))
+        order = np.argsort(self.indices, kind="stable")
+        self.reverse_indices: np.ndarray = sources[order]
+        self.reverse_indptr: np.ndarray = np.zeros(n + 1, dtype=np.int32)
+        np.cumsum(np.bincount(self.indices, minlength=n), out=self.reverse_indptr[1:])
+
+    def rebind(self, segments: List[Segment], intersections: Optional[List[Intersection]] = None) -> 'CompiledNetwork':
+        """
+        Get a compiled network sharing the (read-only) arrays of this one for another set of segment objects created
+        by create_segments from the same roads, e.g. for several environments of the same map.
+
+        Args:
+            segments (List[Segment]): The segments, with their ids assigned.
+            intersections (Optional[List[Intersection]]): The intersections.
+
+        Returns:
+            CompiledNetwork: The network for the given segments.
+        """
+        if len(segments) != len(self.segments):
+            raise ValueError(f"Expected {len(self.segments)} segments, got {len(segments)}")
+        network = copy.copy(self)
+        network.segments = list(segments)
+        network.intersections = list(intersections) if intersections is not None else []
+        for i, (segment, compiled) in enumerate(zip(network.segments, self.segments)):
+            if segment.id != i or type(segment) is not type(compiled) or segment.length != compiled.length:
+                raise ValueError(f"Segment {segment} does not match segment {compiled} of the compiled network")
+        return network
+
+    @staticmethod
+    def _coordinates(segment: Segment) -> List[int]:
+        """
+        Get the entry and exit coordinates of a segment as [begin_x, begin_y, end_x, end_y].
+        """
+        if isinstance(segment, CrossingSegment):
+            x = segment.vert_lane.top + MID_LANE
+            y = segment.horiz_lane.top + MID_LANE
+            return [x, y, x, y]
+        middle = segment.lane.top + MID_LANE
+        if segment.lane.road.horizontal:
+            return [segment.begin, middle, segment.end, middle]
+        return [middle, segment.begin, middle, segment.end]
+
+    def __len__(self) -> int:
+        return len(self.segments)
+
+    @property
+    def num_edges(self) -> int:
+        """
+        The number of directed edges between segments.
+        """
+        return len(self.indices)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        The memory used by the arrays of the compiled network in bytes.
+        """
+        return sum(array.nbytes for array in (self.is_crossing, self.length, self.max_speed, self.direction,
+                                              self.begin_x, self.begin_y, self.end_x, self.end_y,
+                                              self.indptr, self.indices, self.edge_direction,
+                                              self.reverse_indptr, self.reverse_indices))
+
+    def successors(self, segment_id: int) -> np.ndarray:
+        """
+        Get the ids of the segments that can be entered directly after a segment.
+
+        Args:
+            segment_id (int): The id of the segment.
+
+        Returns:
+            np.ndarray: The ids of the successor segments.
+        """
+        return self.indices[self.indptr[segment_id]:self.indptr[segment_id + 1]]
+
+    def predecessors(self, segment_id: int) -> np.ndarray:
+        """
+        Get the ids of the segments from which a segment can be entered directly.
+
+        Args:
+            segment_id (int): The id of the segment.
+
+        Returns:
+            np.ndarray: The ids of the predecessor segments.
+        """
+        return self.reverse_indices[self.reverse_indptr[segment_id]:self.reverse_indptr[segment_id + 1]]
+
+    @cached_property
+    def successor_lists(self) -> List[List[int]]:
+        """
+        The successors of each segment as Python lists, for graph searches written in plain Python.
+        """
+        indices = self.indices.tolist()
+        return [indices[begin:end] for begin, end in zip(self.indptr[:-1].tolist(), self.indptr[1:].tolist())]
+
+    @cached_property
+    def predecessor_lists(self) -> List[List[int]]:
+        """
+        The predecessors of each segment as Python lists, for graph searches written in plain Python.
+        """
+        indices = self.reverse_indices.tolist()
+        return [indices[begin:end]
+                for begin, end in zip(self.reverse_indptr[:-1].tolist(), self.reverse_indptr[1:].tolist())]
+
+    def lane_segment_ids(self) -> np.ndarray:
+        """
+        Get the ids of all lane segments.
+        """
+        return np.flatnonzero(~self.is_crossing)
+
+    def direction_counts(self) -> Dict[Direction, int]:
+        """
+        Count the lane segments of each direction.
+        """
+        counts = np.bincount(self.direction, minlength=len(Direction) + 1)
+        return {direction: int(counts[direction.value]) for direction in Direction}
+
+    def __str__(self) -> str:
+        return f"CompiledNetwork: {len(self.segments)} segments ({int(self.is_crossing.sum())} crossings), " \
+               f"{self.num_edges} edges, {self.nbytes / 1024:.1f} KiB"
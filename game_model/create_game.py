@@ -102,5 +102,8 @@ def create_segments(roads: List[Road]) -> Optional[List[Segment]]:
                                 # if isinstance(lane.segments[j - 1], CrossingSegment):
                                 #     lane.segments[j - 1].up = lane.segments[j]
 
+    for i, segment in enumerate(segments):
+        segment.id = i
+
     return segments, intersections
 
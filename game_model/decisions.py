@@ -0,0 +1,180 @@
+import multiprocessing
+import os
+import sys
+import traceback
+from typing import TYPE_CHECKING, List, Sequence, Tuple
+
+from controller.astar_car_controller import AstarCarController
+
+if TYPE_CHECKING:
+    from game_model.game_model import TrafficEnv
+
+# The decision of a car: the index of its controller, its action, the first_go flag of the controller, whether the
+# safety check of get_action cancelled the lane change of the car and the ids of the segments it routed over, which
+# are only filled in if the car might fall asleep (see TrafficEnv._fall_asleep)
+Decision = Tuple[int, Tuple[int, int], bool, bool, Tuple[int, ...]]
+
+
+def fork_available() -> bool:
+    """
+    Whether worker processes can be forked with a copy of the environment, which is not the case on Windows.
+
+    Returns:
+        bool: True if the fork start method is available.
+    """
+    return "fork" in multiprocessing.get_all_start_methods()
+
+
+def make_decision(index: int, controller: AstarCarController) -> Decision:
+    """
+    Let a controller decide and record the side effects of get_action, to be replayed in another process.
+
+    Args:
+        index (int): The index of the controller in TrafficEnv.controllers.
+        controller (AstarCarController): The controller.
+
+    Returns:
+        Decision: The decision.
+    """
+    car = controller.car
+    changing_lane = car.changing_lane
+    action = controller.get_action()
+    routed = tuple(segment.id for segment in car.routed_segments()) if action == (0, 0) and car.speed == 0 else ()
+    return index, action, controller.first_go, bool(changing_lane) and not car.changing_lane, routed
+
+
+def replay_side_effects(env: 'TrafficEnv', decisions: Sequence[Decision]) -> None:
+    """
+    Repeat the side effects of get_action for decisions made in another process.
+
+    Args:
+        env (TrafficEnv): The environment.
+        decisions (Sequence[Decision]): The decisions.
+    """
+    for index, _, first_go, cancelled_lane_change, _ in decisions:
+        controller = env.controllers[index]
+        controller.first_go = first_go
+        if cancelled_lane_change:
+            controller.car.changing_lane = False
+            controller.car.reserved_segment = None
+
+
+def _serve(connection, env: 'TrafficEnv') -> None:
+    """
+    Decide for chunks of the controllers of a replica of the environment, in a worker process.
+    """
+    # The replica repeats every move of the environment, including its prints
+    sys.stdout = open(os.devnull, "w")
+    while True:
+        command, data = connection.recv()
+        try:
+            if command == "decide":
+                connection.send([make_decision(index, env.controllers[index]) for index in data])
+            elif command == "apply":
+                decisions, indices, actions = data
+                replay_side_effects(env, decisions)
+                env._apply_actions([env.controllers[index].car for index in indices], actions)
+            else:
+                connection.close()
+                break
+        except Exception:
+            connection.send(RuntimeError(f"Decision worker failed:\n{traceback.format_exc()}"))
+            connection.close()
+            break
+
+
+class DecisionPool:
+    """
+    A persistent pool of worker processes that make the decisions of a two-phase tick.
+
+    Every worker is forked once with a replica of the environment. get_action only reads the state of the other
+    cars, so as long as no car moves, the decisions do not depend on each other or on their order: the controllers
+    that decide in a tick are split into contiguous chunks, one per worker. Once the environment knows the actions
+    of the tick, follow sends them to the workers, which replay the side effects of get_action and the moves on their
+    replicas while the environment applies them. The results are the same as deciding in a single process.
+
+    The replicas only follow the two-phase ticks of play_step. After anything else changes the environment (reset,
+    restore, step, fast_forward), the workers have to be closed and forked again. Forking is needed to replicate
+    the environment, see fork_available.
+
+    Attributes:
+        workers (int): The number of worker processes.
+    """
+
+    def __init__(self, env: 'TrafficEnv', workers: int) -> None:
+        """
+        Fork the worker processes.
+
+        Args:
+            env (TrafficEnv): The environment, replicated into every worker.
+            workers (int): The number of worker processes.
+        """
+        self.workers = workers
+        self._index = {controller: index for index, controller in enumerate(env.controllers)}
+        self._decisions: List[Decision] = []
+        self._connections = []
+        self._processes = []
+        context = multiprocessing.get_context("fork")
+        for _ in range(workers):
+            parent_connection, child_connection = context.Pipe()
+            process = context.Process(target=_serve, daemon=True, args=(child_connection, env))
+            process.start()
+            child_connection.close()
+            self._connections.append(parent_connection)
+            self._processes.append(process)
+
+    def decide(self, env: 'TrafficEnv', controllers: Sequence[AstarCarController]) -> List[Decision]:
+        """
+        Let the workers decide for the controllers and replay the side effects of get_action in the environment.
+
+        The caller has to pass the actions of the tick to follow and apply them with TrafficEnv._apply_actions.
+
+        Args:
+            env (TrafficEnv): The environment the workers were forked from.
+            controllers (Sequence[AstarCarController]): The controllers that decide, in order.
+
+        Returns:
+            List[Decision]: The decision of every controller.
+        """
+        indices = [self._index[controller] for controller in controllers]
+        chunk_size = -(-len(indices) // self.workers)
+        for i, connection in enumerate(self._connections):
+            connection.send(("decide", indices[i * chunk_size:(i + 1) * chunk_size]))
+        decisions = []
+        for connection in self._connections:
+            result = connection.recv()
+            if isinstance(result, Exception):
+                self.close()
+                raise result
+            decisions.extend(result)
+        replay_side_effects(env, decisions)
+        self._decisions = decisions
+        return decisions
+
+    def follow(self, controllers: Sequence[AstarCarController], actions: Sequence[Tuple[int, int]]) -> None:
+        """
+        Send the workers the actions of the tick, to apply on their replicas.
+
+        Args:
+            controllers (Sequence[AstarCarController]): The controllers of all active cars, in order.
+            actions (Sequence[Tuple[int, int]]): Their actions.
+        """
+        indices = [self._index[controller] for controller in controllers]
+        for connection in self._connections:
+            connection.send(("apply", (self._decisions, indices, list(actions))))
+        self._decisions = []
+
+    def close(self) -> None:
+        """
+        Stop the worker processes.
+        """
+        for connection in self._connections:
+            try:
+                connection.send(("close", None))
+            except (BrokenPipeError, OSError):
+                pass
+            connection.close()
+        for process in self._processes:
+            process.join()
+        self._connections = []
+        self._processes = []
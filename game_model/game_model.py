@@ -1,11 +1,22 @@
 import random
-from typing import Optional, Tuple, List
+from typing import Dict, Optional, Sequence, Set, Tuple, List, Union
+
+import numpy as np
 
 from controller.astar_car_controller import AstarCarController
 from game_model.car import Car
-from game_model.road_network import Direction, Goal, Road, LaneSegment, Problem, Point
-from game_model.helper_functions import create_random_car, overlap, reached_goal, collision_check
+from game_model.car_store import CarStore
+from game_model.road_network import CrossingSegment, Direction, Goal, Intersection, Road, LaneSegment, Problem, Point, Segment, \
+    true_direction
+from game_model.helper_functions import create_random_car, dist, overlap, reached_goal, collision_check
 from game_model.create_game import create_segments
+from game_model.compiled_network import CompiledNetwork
+from game_model.decisions import DecisionPool, fork_available
+from game_model.kinematics import LaneMove, apply_lane_move, plan_lane_moves
+from game_model.replica_pool import ReplicaPool
+from game_model.snapshot import EnvSnapshot
+from game_model.routing import AstarRouter, CongestionRouter, LandmarkRouter, RouteCache, Router, RoutingTable, \
+    ShortestPathTrees
 from game_model.constants import *
 
 
@@ -16,14 +27,35 @@ class TrafficEnv:
     Attributes:
         roads (List[Road]): List of roads in the environment.
         segments (List[Segment]): List of segments created from the roads.
+        network (CompiledNetwork): The integer-indexed array form of the segments.
         players (int): Number of players in the environment.
         cars_controllers (Dict[Car, Optional[AstarCarController]]): Dictionary of cars and corresponding controllers.
         n_actions (int): Number of possible actions.
         moved (bool): Flag to indicate if a car has moved.
         time (int): Current time in the environment.
+        router (Optional[Router]): Router shared by all cars, None if every car runs its own search (Car.astar).
+        broad_phase (bool): Whether crash detection only tests cars sharing a segment.
+        car_store (Optional[CarStore]): The columnar store of the car states, None if the cars keep their own state.
+        two_phase (bool): Whether all cars decide before any car moves.
+        decision_workers (int): The number of worker processes making the decisions of a two-phase tick.
+        replica_workers (int): The number of worker processes that make the two-phase decisions, one map region each.
+        random (random.Random): The random generator of this environment, placing the cars and goals.
+        active_cars (Dict[Car, AstarCarController]): The cars still driving and their controllers, in the order of cars.
+        dead_cars (Set[Car]): The cars that crashed or made an impossible move.
+        finished_cars (Set[Car]): The cars that passed WINNING_SCORE. They keep driving, but no longer keep the game
+            going.
+        sleep (bool): Whether stopped cars skip their decisions until something they depend on changes.
+        skipped_decisions (int): The number of decisions skipped for sleeping cars since the last reset.
     """
 
-    def __init__(self, roads: List[Road], players: int, cars: Optional[List[Car]] = None, controllers: Optional[List[AstarCarController]] = None):
+    # The columns of get_observation
+    observation_features = ("speed", "max_speed", "loc", "size", "segment", "direction", "goal", "dead", "score")
+
+    def __init__(self, roads: List[Road], players: int, cars: Optional[List[Car]] = None, controllers: Optional[List[AstarCarController]] = None,
+                 routing: str = "astar", route_cache_size: Optional[int] = None, broad_phase: bool = True,
+                 car_store: bool = False, two_phase: bool = False, decision_workers: int = 0,
+                 network: Optional[CompiledNetwork] = None, seed: Optional[int] = None, replica_workers: int = 0,
+                 sleep: bool = False):
         """
         Initialize the TrafficEnv.
 
@@ -32,14 +64,80 @@ class TrafficEnv:
             players (int): Number of players in the environment.
             cars (Optional[List[Car]]): List of cars in the environment.
             controllers (Optional[List[AstarCarController]]): List of car controllers.
+            routing (str): "astar" to let every car search its routes with Car.astar, "compiled" to search with a shared
+                AstarRouter on the compiled network, "landmarks" to search with landmark heuristics (LandmarkRouter),
+                "trees" to share ShortestPathTrees towards the goals, "table" to precompute a RoutingTable for the
+                network, "congestion" to search with live occupancy costs (CongestionRouter).
+            route_cache_size (Optional[int]): If given, routes are cached in a RouteCache of this size shared by all cars.
+                Not possible with "congestion" routing, whose routes depend on every car.
+            broad_phase (bool): If True, crash detection only tests cars sharing a segment. If False, every moved car is
+                tested against every other car (for validation).
+            car_store (bool): If True, the random cars keep their scalar state in a columnar CarStore.
+            two_phase (bool): If True, every tick first lets all controllers decide against the same state and then
+                applies all actions, planning the moves within a lane segment of all cars at once. If False, each car
+                decides after the previous cars moved.
+            decision_workers (int): If more than 1, the decisions of a two-phase tick are spread over a persistent pool
+                of this many worker processes, each holding a replica of the environment (see DecisionPool). Where
+                worker processes cannot be forked (Windows), the decisions are made in this process. Call close to
+                stop the workers.
+            network (Optional[CompiledNetwork]): A compiled network of the same roads whose arrays are shared instead of
+                compiling the segments again, e.g. by the environments of a VecTrafficEnv.
+            seed (Optional[int]): If given, the random generator of this environment is seeded with it. Otherwise
+                it takes over the state of the global random generator to place the first cars and goals and hands
+                the state after that back, so seeding the global generator before creating an environment
+                reproduces it, and environments created one after the other do not repeat each other. From then
+                on, the environment only draws from its own generator.
+            replica_workers (int): If more than 1, the decisions of a two-phase tick are made by a persistent pool of
+                this many worker processes, each deciding for the cars in one region of the map and receiving only
+                the state near that region (see ReplicaPool). Not possible with "congestion" routing, whose routes
+                depend on every car. Where worker processes cannot be forked (Windows), the decisions are made in
+                this process. Call close to stop the workers.
+            sleep (bool): If True, a stopped car whose controller decided not to move sleeps: it keeps that decision
+                without calling get_action until a car enters, leaves or moves on one of the segments its decision
+                depends on, or the priorities of the intersections ahead change. Not possible with "congestion"
+                routing, whose routes depend on every car.
         """
         super().__init__()
         self.scores = None
         self.roads = roads
         self.segments, self.intersections = create_segments(roads)
+        if network is None:
+            self.network = CompiledNetwork(self.segments, self.intersections)
+        else:
+            self.network = network.rebind(self.segments, self.intersections)
+        self.random = random.Random(seed)
+        if seed is None:
+            self.random.setstate(random.getstate())
+        if route_cache_size is not None and routing == "congestion":
+            raise ValueError("Congestion routes cannot be cached, a cheaper route may open up anywhere")
+        self.router = self._create_router(routing, route_cache_size)
+        if sleep and routing == "congestion":
+            raise ValueError("Sleeping cars need routes that do not depend on the traffic")
+        if replica_workers > 1 and routing == "congestion":
+            raise ValueError("Replica workers only see the cars near their region, congestion routes depend on every car")
+        self._congestion = routing == "congestion"
+        self.sleep = sleep
+        # The segments and intersections every sleeping car depends on, and the sleeping cars depending on each
+        self._sleeping: Dict[Car, Set[Union[Segment, Intersection]]] = {}
+        self._sleepers: Dict[Union[Segment, Intersection], Set[Car]] = {}
+        self.skipped_decisions = 0
+        if self._congestion or sleep:
+            for segment in self.segments:
+                segment.listener = self._segment_changed
         self.players = players
+        self.broad_phase = broad_phase
+        self.car_store: Optional[CarStore] = CarStore(max(1, players)) if car_store else None
+        self.two_phase = two_phase
+        self.decision_workers = decision_workers
+        self.replica_workers = replica_workers
+        self._replica_pool: Optional[ReplicaPool] = None
+        self._decision_pool: Optional[DecisionPool] = None
         self.cars = cars
         self.controllers = controllers
+        self.active_cars: Dict[Car, AstarCarController] = {}
+        self.dead_cars: Set[Car] = set()
+        self.finished_cars: Set[Car] = set()
+        self._car_order: Dict[Car, int] = {}
         self.n_actions = N_ACTIONS
         # init display
         self.moved = True
@@ -55,19 +153,137 @@ class TrafficEnv:
 
         if cars is None or controllers is None:
             self.reset()
+            if seed is None:
+                random.setstate(self.random.getstate())
+        else:
+            for car in self.cars:
+                car.router = self.router
+                self._acquire_goals(car)
+            self._track_cars()
+
+    def _create_router(self, routing: str, route_cache_size: Optional[int]) -> Optional[Router]:
+        """
+        Create the router shared by all cars.
+
+        Args:
+            routing (str): The routing mode.
+            route_cache_size (Optional[int]): The size of the route cache, None for no cache.
+
+        Returns:
+            Optional[Router]: The router, None if the cars search their routes themselves.
+        """
+        if routing == "astar":
+            router = None
+        elif routing == "compiled":
+            router = AstarRouter(self.network)
+        elif routing == "table":
+            router = RoutingTable(self.network)
+        elif routing == "landmarks":
+            router = LandmarkRouter(self.network)
+        elif routing == "trees":
+            router = ShortestPathTrees(self.network)
+        elif routing == "congestion":
+            router = CongestionRouter(self.network)
+        else:
+            raise ValueError(f"Unknown routing mode {routing}")
+
+        if route_cache_size is not None:
+            router = RouteCache(route_cache_size, router)
+        return router
+
+    def _segment_changed(self, segment: Segment) -> None:
+        """
+        Report a car entering or leaving a segment, or a changed crossing time, to the router and the sleeping cars.
+
+        Args:
+            segment (Segment): The segment.
+        """
+        if self._congestion:
+            self.router.segment_changed(segment)
+        if self._sleepers:
+            self._wake(segment)
+
+    def invalidate_routes(self, segment: Optional[Segment] = None) -> None:
+        """
+        Drop cached routes, e.g. after the network or the cost of a segment changed.
+
+        Args:
+            segment (Optional[Segment]): Drop only the routes using this segment. Defaults to dropping every route.
+        """
+        if isinstance(self.router, RouteCache):
+            self.router.invalidate(segment)
 
-    def reset(self) -> None:
+    def reset(self, seed: Optional[int] = None) -> None:
         """
         Reset the environment to its initial state.
+
+        Args:
+            seed (Optional[int]): If given, the cars and goals of the new episode are placed by a new random generator
+                of this environment with this seed.
         """
+        self.close()
+        if seed is not None:
+            self.random = random.Random(seed)
+        for car in self.cars or []:
+            self._release_goals(car)
+        # Remove the cars of the previous episode from the road network
+        for segment in self.segments:
+            segment.cars.clear()
+            if isinstance(segment, CrossingSegment):
+                segment.time_to_leave.clear()
+                segment.time_to_enter.clear()
+            if self.router is not None:
+                self.router.segment_changed(segment)
+        for intersection in self.intersections:
+            intersection.priority.clear()
+        if self.car_store is not None:
+            self.car_store.reset()
         self.cars: List[Car] = []
         self.controllers: List[AstarCarController] = []
         for i in range(self.players):
-            self.cars.append(create_random_car(self.segments, self.cars))
+            self.cars.append(create_random_car(self.segments, self.cars, self.car_store, self.random))
         for car in self.cars:
+            car.router = self.router
             self._place_goals(car)
             self.controllers.append(AstarCarController(car, car.goal))
         self.time = 0
+        self.total_crashes = 0
+        for direction in self.crashes:
+            self.crashes[direction] = 0
+        self.skipped_decisions = 0
+        self._track_cars()
+
+    def _track_cars(self) -> None:
+        """
+        Sort the cars into the active and dead cars, collect the finished cars and follow their deaths from now on.
+        """
+        self._car_order = {car: i for i, car in enumerate(self.cars)}
+        self._sleeping = {}
+        self._sleepers = {}
+        self.active_cars = {}
+        self.dead_cars = set()
+        self.finished_cars = set()
+        for controller in self.controllers:
+            car = controller.car
+            car.listener = self._car_died
+            if car.score > WINNING_SCORE:
+                self.finished_cars.add(car)
+            if car.dead:
+                self.dead_cars.add(car)
+            else:
+                self.active_cars[car] = controller
+
+    def _car_died(self, car: Car) -> None:
+        """
+        Move a car that crashed or made an impossible move from the active to the dead cars.
+
+        Args:
+            car (Car): The car.
+        """
+        self.active_cars.pop(car, None)
+        self.dead_cars.add(car)
+        if self._sleepers:
+            self._wake_around(car)
 
     def _place_goals(self, car: Car) -> None:
         """
@@ -78,28 +294,58 @@ class TrafficEnv:
         """
 
         if car.goal is None and car.second_goal is None:
-            road = random.choice(self.roads)
-            lane = random.choice(road.right_lanes + road.left_lanes)
-            lane_segment = random.choice([seg for seg in lane.segments if isinstance(seg, LaneSegment)])
+            road = self.random.choice(self.roads)
+            lane = self.random.choice(road.right_lanes + road.left_lanes)
+            lane_segment = self.random.choice([seg for seg in lane.segments if isinstance(seg, LaneSegment)])
             roads = self.roads.copy()
             roads.remove(road)
-            road = random.choice(roads)
-            lane = random.choice(road.right_lanes + road.left_lanes)
-            lane_segment_second = random.choice([seg for seg in lane.segments if isinstance(seg, LaneSegment)])
+            road = self.random.choice(roads)
+            lane = self.random.choice(road.right_lanes + road.left_lanes)
+            lane_segment_second = self.random.choice([seg for seg in lane.segments if isinstance(seg, LaneSegment)])
             car.goal = Goal(lane_segment, car.color)
             car.second_goal = Goal(lane_segment_second, car.color)
+            self._acquire_goals(car)
         else:
             roads_copy = self.roads.copy()
             #remove the road used by the first goal
             roads_copy.remove(car.goal.lane_segment.road)
-            road = random.choice(roads_copy)
-            lane = random.choice(road.right_lanes + road.left_lanes)
-            lane_segment = random.choice([seg for seg in lane.segments if isinstance(seg, LaneSegment)])
+            road = self.random.choice(roads_copy)
+            lane = self.random.choice(road.right_lanes + road.left_lanes)
+            lane_segment = self.random.choice([seg for seg in lane.segments if isinstance(seg, LaneSegment)])
+            if self.router is not None:
+                self.router.release_goal(car.goal.lane_segment)
+                self.router.acquire_goal(lane_segment)
             car.goal.lane_segment = car.second_goal.lane_segment
             car.second_goal.lane_segment = lane_segment
             car.goal.update_position()
             car.second_goal.update_position()
 
+    def _acquire_goals(self, car: Car) -> None:
+        """
+        Report the goal and second goal of a car to the router.
+
+        Args:
+            car (Car): The car.
+        """
+        if self.router is None:
+            return
+        for goal in (car.goal, car.second_goal):
+            if goal is not None:
+                self.router.acquire_goal(goal.lane_segment)
+
+    def _release_goals(self, car: Car) -> None:
+        """
+        Report to the router that a car no longer heads to its goal and second goal.
+
+        Args:
+            car (Car): The car.
+        """
+        if self.router is None:
+            return
+        for goal in (car.goal, car.second_goal):
+            if goal is not None:
+                self.router.release_goal(goal.lane_segment)
+
     def play_step(self) -> bool:
         """
         Execute a step in the environment for each car.
@@ -108,72 +354,498 @@ class TrafficEnv:
             bool: A boolean indicating if the game is over.
         """
         game_over = True
+        car_order = self._car_order if self.broad_phase else None
 
-        for controller in self.controllers:
+        if self.two_phase:
+            controllers = list(self.active_cars.values())
+            return self._apply_actions([controller.car for controller in controllers], self._decide(controllers))
+
+        for controller in list(self.active_cars.values()):
             car = controller.car
+            # A car can be killed by the move of an earlier car in this tick
             if car.dead:
                 continue
 
-            action = controller.get_action()
-            moved = self._move(car, action)  # update the head
+            if car in self._sleeping:
+                # A sleeping car keeps its decision to stand still
+                self.skipped_decisions += 1
+                action = (0, 0)
+            else:
+                action = controller.get_action()
+                if self.sleep:
+                    self._fall_asleep(controller, action)
+            if self._apply_action(car, action, car_order):
+                game_over = False
 
-            # increment time
-            self.time += 1
+        # return game over
+        return game_over
 
-            # Check if the action was possible
-            if isinstance(moved, Problem):
-                car.dead = True
-                continue
+    def _decide(self, controllers: List[AstarCarController]) -> List[Tuple[int, int]]:
+        """
+        Let the controllers of the active cars decide in the first phase of a two-phase tick, in the replica or
+        decision workers if there are any. Sleeping cars keep standing without deciding.
 
-            # Crash detection:
-            for other_car in self.cars:
-                if other_car != car:
-                    # if overlap(car.pos, car.w, car.h,
-                    #            other_car.pos, other_car.w, other_car.h):
-                    if collision_check(car, other_car):
-                        self.total_crashes += 1
-                        self.crashes[car.direction] += 1
-                        print("___________________________________________________________________________")
-                        print(f"Frame = {self.time // len(self.cars)},  Crash: {self.total_crashes}")
-                        print(f"Direction = {car.direction},  Crash: {self.crashes[car.direction]}")
-                        print(f"First car {car.name} loc {car.loc} speed {car.speed}")
-                        for seg in car.res:
-                            print(seg)
-                        print(f"Second car {other_car.name} loc {other_car.loc} speed {other_car.speed}")
-                        for seg in other_car.res:
-                            print(seg)
-                        print("___________________________________________________________________________")
-                        car.dead = True
-                        other_car.dead = True
-                        continue
-
-            # Place new goal if the goal is reached
-            if reached_goal(car, car.goal):
-                car.score += 1
-                self._place_goals(car)
-
-            # Player won!
-            if car.score > WINNING_SCORE:
-                continue
+        Args:
+            controllers (List[AstarCarController]): The controllers of the active cars, in order.
 
-            game_over = False
+        Returns:
+            List[Tuple[int, int]]: Their actions.
+        """
+        awake = controllers
+        if self.sleep:
+            awake = [controller for controller in controllers if controller.car not in self._sleeping]
+            self.skipped_decisions += len(controllers) - len(awake)
+        pool: Optional[Union[ReplicaPool, DecisionPool]] = None
+        if self.replica_workers > 1 and fork_available():
+            if self._replica_pool is None:
+                self._replica_pool = ReplicaPool(self, self.replica_workers)
+            pool = self._replica_pool
+        elif self.decision_workers > 1 and fork_available():
+            if self._decision_pool is None:
+                self._decision_pool = DecisionPool(self, self.decision_workers)
+            pool = self._decision_pool
+        if pool is not None:
+            decisions = pool.decide(self, awake)
+            decided = [action for _, action, _, _, _ in decisions]
+            routed = [{self.segments[i] for i in segment_ids} for _, _, _, _, segment_ids in decisions]
+        else:
+            decided = [controller.get_action() for controller in awake]
+            routed = [None] * len(awake)
+        actions = decided
+        if self.sleep:
+            for controller, action, routed_segments in zip(awake, decided, routed):
+                self._fall_asleep(controller, action, routed_segments)
+            decisions_of = dict(zip(awake, decided))
+            actions = [decisions_of.get(controller, (0, 0)) for controller in controllers]
+        if self._decision_pool is not None:
+            self._decision_pool.follow(controllers, actions)
+        return actions
+
+    def _apply_actions(self, cars: Sequence[Car], actions: Sequence[Tuple[int, int]]) -> bool:
+        """
+        Apply actions that were all chosen before any car moves: the second phase of a two-phase tick, or step.
 
-        # return game over
+        The moves of the cars that keep their lane and stay within their lane segment are planned for all cars at
+        once with plan_lane_moves, reading the CarStore columns if there is one. Every move is still applied at the
+        turn of its car, so crashes are detected in the same order as before.
+
+        The sequential tick of play_step cannot plan its moves this way: a car only decides, and so only knows its
+        speed, after the cars before it moved, so there is never more than one move to plan.
+
+        Args:
+            cars (Sequence[Car]): The active cars, in order.
+            actions (Sequence[Tuple[int, int]]): Their actions.
+
+        Returns:
+            bool: A boolean indicating if the game is over.
+        """
+        game_over = True
+        car_order = self._car_order if self.broad_phase else None
+        keeping = [(car, acceleration) for car, (acceleration, lane_change) in zip(cars, actions) if lane_change == 0]
+        speed = np.array([max(min(car.speed + acceleration, car.max_speed), 0) for car, acceleration in keeping],
+                         dtype=np.int64)
+        lane_moves = plan_lane_moves([car for car, _ in keeping], speed, self.car_store)
+        for car, action in zip(cars, actions):
+            # A car can be killed by the move of an earlier car in this tick
+            if not car.dead and self._apply_action(car, action, car_order, lane_moves.get(car)):
+                game_over = False
         return game_over
 
-    def _move(self, car: Car, action: Tuple[int, int]) -> bool:
+    def step(self, actions: Sequence[Tuple[int, int]]) -> bool:
+        """
+        Execute a step in the environment with externally chosen actions instead of the controllers.
+
+        Args:
+            actions (Sequence[Tuple[int, int]]): The (acceleration, lane change) action of every car in cars, in that
+                order. The actions of dead cars are ignored.
+
+        Returns:
+            bool: A boolean indicating if the game is over.
+        """
+        # The decision workers only follow play_step
+        self._close_decision_pool()
+        playing = [(car, action) for car, action in zip(self.cars, actions) if car in self.active_cars]
+        return self._apply_actions([car for car, _ in playing], [action for _, action in playing])
+
+    def get_observation(self) -> np.ndarray:
+        """
+        Get the state of every car as one row of numbers, with the columns given by observation_features.
+        Locations are measured from the beginning of the segment in driving direction, segments and goals are
+        segment ids and directions are Direction values.
+
+        Returns:
+            np.ndarray: The observation of shape (len(cars), len(observation_features)).
+        """
+        observation = np.array([(car.speed, car.max_speed, abs(car.loc), car.size, car.res[0].segment.id,
+                                 car.direction.value, car.goal.lane_segment.id, car.dead, car.score)
+                                for car in self.cars], dtype=np.int32)
+        return observation.reshape(len(self.cars), len(self.observation_features))
+
+    def is_deadlocked(self) -> bool:
+        """
+        Check if all cars are standing still. Dead cars do not move.
+
+        Returns:
+            bool: True if no car is moving.
+        """
+        return all(car.speed == 0 for car in self.active_cars)
+
+    def fast_forward(self, max_ticks: int) -> Tuple[int, bool]:
+        """
+        Play up to max_ticks ticks, skipping the ticks in which nothing but the locations of the cars can change.
+
+        One tick is always played with play_step. If every active car cruised through it (it stayed on the same lane
+        segment at the same speed as the other cars on that segment, without changing lanes), the following ticks
+        repeat it shifted along the lanes: every controller keeps its speed and no car meets another. The cars are
+        then moved directly to the last tick before the earliest event of any car: its reservation has to be
+        extended into the next segment (extend_res, or the look ahead of get_accelerate), it enters the priority
+        zone of the intersection ahead, or it reaches its goal. The result is the same trajectory as calling
+        play_step for every tick.
+
+        Args:
+            max_ticks (int): The maximum number of ticks to advance.
+
+        Returns:
+            Tuple[int, bool]: The number of ticks advanced and whether the game is over.
+        """
+        if max_ticks <= 0:
+            return 0, False
+        before = {}
+        for car, controller in self.active_cars.items():
+            if not self._cruising(car, controller):
+                before = None
+                break
+            before[car] = (car.res[0].segment, car.speed, abs(car.loc))
+        total_crashes = self.total_crashes
+
+        game_over = self.play_step()
+        if before is None or game_over or max_ticks == 1 or total_crashes != self.total_crashes \
+                or len(before) != len(self.active_cars):
+            return 1, game_over
+
+        skip = max_ticks - 1
+        for car, controller in self.active_cars.items():
+            segment, speed, loc = before[car]
+            if not self._cruising(car, controller) or car.res[0].segment is not segment or car.speed != speed \
+                    or abs(car.loc) != loc + speed \
+                    or any(other_car not in before or other_car.speed != speed for other_car in segment.cars):
+                return 1, False
+            # The reservation of the car covers its braking distance, after k more ticks it ends at
+            # abs(loc) + k * speed + braking_distance
+            free = segment.length - abs(car.loc) - car.get_braking_distance()
+            extend_ticks = (free - 1) // speed
+            priority_ticks = (free - segment.length // 10 - 1) // speed + 1
+            skip = min(skip, extend_ticks, priority_ticks)
+            if segment is car.goal.lane_segment:
+                skip = min(skip, self._ticks_to_goal(car, skip))
+        if skip <= 0:
+            return 1, False
+
+        # The decision workers only follow play_step
+        self._close_decision_pool()
+        for car in self.active_cars:
+            seg_info = car.res[0]
+            sign = 1 if true_direction[seg_info.direction] else -1
+            car.loc += sign * skip * car.speed
+            car.time += skip
+            seg_info.begin = car.loc
+            seg_info.end = sign * (abs(car.loc) + max(car.size, car.get_braking_distance()))
+            car._update_position()
+        self.time += skip * len(self.active_cars)
+        return 1 + skip, False
+
+    @staticmethod
+    def _ticks_to_goal(car: Car, max_ticks: int) -> int:
+        """
+        Count the ticks a cruising car on the segment of its goal can drive before reached_goal holds.
+
+        Args:
+            car (Car): The car.
+            max_ticks (int): The maximum number of ticks to look ahead.
+
+        Returns:
+            int: The number of ticks, at most max_ticks.
+        """
+        center = car.get_center()
+        step = (1 if true_direction[car.res[0].direction] else -1) * car.speed
+        horizontal = car.res[0].segment.road.horizontal
+        for ticks in range(1, max_ticks + 1):
+            shift = ticks * step
+            moved = Point(center.x + shift, center.y) if horizontal else Point(center.x, center.y + shift)
+            # The distance reached_goal tests
+            if dist(moved, car.goal.pos) < car.size // 2 + BLOCK_SIZE // 2:
+                return ticks - 1
+        return max_ticks
+
+    @staticmethod
+    def _cruising(car: Car, controller: AstarCarController) -> bool:
+        """
+        Check if a car drives steadily within one lane segment, see fast_forward.
+
+        Args:
+            car (Car): The car.
+            controller (AstarCarController): Its controller.
+
+        Returns:
+            bool: True if the car cruises.
+        """
+        return car.speed > 0 and not controller.first_go and not car.changing_lane and not car.parallel_res \
+            and len(car.res) == 1 and isinstance(car.res[0].segment, LaneSegment) and not car.res[0].turn
+
+    def snapshot(self) -> EnvSnapshot:
+        """
+        Copy the dynamic state of the environment, e.g. to try out actions and go back.
+        The road network, cars and controllers are shared with the snapshot, only their changing state is copied.
+
+        Returns:
+            EnvSnapshot: The snapshot, to be passed to restore.
+        """
+        return EnvSnapshot(self)
+
+    def restore(self, snapshot: EnvSnapshot) -> None:
+        """
+        Return the environment to the state of a snapshot taken from it since the last reset.
+        A snapshot can be restored any number of times.
+
+        Args:
+            snapshot (EnvSnapshot): The snapshot.
+
+        Raises:
+            ValueError: If the snapshot was taken from another environment or before the last reset.
+        """
+        # The decision workers only follow play_step
+        self._close_decision_pool()
+        snapshot.restore(self)
+        self._track_cars()
+
+    def close(self) -> None:
+        """
+        Stop the decision and replica worker processes, if any. They are forked again by the next two-phase tick.
+        """
+        if self._replica_pool is not None:
+            self._replica_pool.close()
+            self._replica_pool = None
+        self._close_decision_pool()
+
+    def _close_decision_pool(self) -> None:
+        """
+        Stop the decision worker processes, if any, e.g. because the environment changes outside play_step.
+        """
+        if self._decision_pool is not None:
+            self._decision_pool.close()
+            self._decision_pool = None
+
+    def _fall_asleep(self, controller: AstarCarController, action: Tuple[int, int],
+                     routed: Optional[Set[Segment]] = None) -> None:
+        """
+        Let a car sleep if its controller decided to keep it standing.
+
+        The decision of a standing car only depends on its own state, the cars on the segments it reserved and on
+        the route ahead it looked at (their order, speeds, reservations and crossing times) and the priorities of
+        the intersections on the way. The car sleeps until one of these segments reports a change, or a car on them
+        or asking an intersection for priority changes its state, see _apply_action.
+
+        Args:
+            controller (AstarCarController): The controller of the car.
+            action (Tuple[int, int]): The action it decided on.
+            routed (Optional[Set[Segment]]): The segments the decision routed over, if it was made in a decision
+                worker. Defaults to car.routed_segments().
+        """
+        car = controller.car
+        if action != (0, 0) or car.speed != 0 or controller.first_go or car.changing_lane or car.parallel_res:
+            return
+        watched: Set[Union[Segment, Intersection]] = {seg_info.segment for seg_info in car.res}
+        watched.update(car.routed_segments() if routed is None else routed)
+        watched.update([segment.intersection for segment in watched if isinstance(segment, CrossingSegment)])
+        self._sleeping[car] = watched
+        for blocker in watched:
+            self._sleepers.setdefault(blocker, set()).add(car)
+
+    def _wake(self, blocker: Union[Segment, Intersection], mover: Optional[Car] = None) -> None:
+        """
+        Wake the cars sleeping on a segment or intersection.
+
+        Args:
+            blocker (Union[Segment, Intersection]): The segment or intersection that changed.
+            mover (Optional[Car]): The car that changed it. Cars standing ahead of it on its lane segment keep
+                sleeping, as a car only yields to the cars in front of it.
+        """
+        sleepers = self._sleepers.get(blocker)
+        if not sleepers:
+            return
+        if mover is not None:
+            sleepers = [car for car in sleepers
+                        if car.res[0].segment is not mover.res[0].segment or abs(car.loc) < abs(mover.loc)]
+        for car in list(sleepers):
+            self._wake_car(car)
+
+    def _wake_car(self, car: Car) -> None:
+        """
+        Wake a sleeping car, so it decides again in the next tick.
+
+        Args:
+            car (Car): The sleeping car.
+        """
+        for watched in self._sleeping.pop(car):
+            self._sleepers[watched].discard(car)
+            if not self._sleepers[watched]:
+                del self._sleepers[watched]
+
+    def _wake_around(self, car: Car) -> None:
+        """
+        Wake the cars sleeping on the segments a car occupies or reserves.
+
+        Args:
+            car (Car): The car whose state changed.
+        """
+        for seg_info in car.res + car.parallel_res:
+            self._wake(seg_info.segment, car)
+
+    def _motion_state(self, car: Car) -> tuple:
+        """
+        The part of the state of a car its own and other controllers look at, to find out if a move changed anything.
+        """
+        return (car.speed, car.loc, car.dead, car.changing_lane, len(car.res), car.res[0].segment, car.res[-1].segment,
+                car.res[-1].end, len(car.parallel_res), car in self.active_cars, car.goal.lane_segment)
+
+    def _asked_priority(self, car: Car) -> Set[Intersection]:
+        """
+        The intersections a car holds a priority at, out of those of its crossings and the one at the end of its
+        reservation.
+        """
+        asked = set()
+        for seg_info in car.res:
+            segment = seg_info.segment
+            intersection = segment.intersection if isinstance(segment, CrossingSegment) \
+                else segment.end_crossing.intersection if segment.end_crossing is not None else None
+            if intersection is not None and car in intersection.priority:
+                asked.add(intersection)
+        return asked
+
+    def _apply_action(self, car: Car, action: Tuple[int, int], car_order: Optional[Dict[Car, int]],
+                      lane_move: Optional[LaneMove] = None) -> bool:
+        """
+        Move a car, then detect crashes and reached goals. With sleeping cars, the cars depending on the car are
+        woken if it changed its state or its priorities.
+
+        Args:
+            car (Car): The car.
+            action (Tuple[int, int]): The action of the car.
+            car_order (Optional[Dict[Car, int]]): The index of every car, for the broad-phase crash detection.
+            lane_move (Optional[LaneMove]): The move planned with plan_lane_moves, None to call Car.move.
+
+        Returns:
+            bool: True if the car is still playing.
+        """
+        if not self._sleepers:
+            # Cars only fall asleep when they decide, nobody can depend on this move
+            return self._play_action(car, action, car_order, lane_move)
+        state = self._motion_state(car)
+        asked = self._asked_priority(car)
+        playing = self._play_action(car, action, car_order, lane_move)
+        if self._motion_state(car) != state:
+            if car in self._sleeping:
+                self._wake_car(car)
+            self._wake_around(car)
+        for intersection in asked.symmetric_difference(self._asked_priority(car)):
+            self._wake(intersection)
+        return playing
+
+    def _play_action(self, car: Car, action: Tuple[int, int], car_order: Optional[Dict[Car, int]],
+                     lane_move: Optional[LaneMove] = None) -> bool:
+        """
+        Move a car, then detect crashes and reached goals.
+
+        Args:
+            car (Car): The car.
+            action (Tuple[int, int]): The action of the car.
+            car_order (Optional[Dict[Car, int]]): The index of every car, for the broad-phase crash detection.
+            lane_move (Optional[LaneMove]): The move planned with plan_lane_moves, None to call Car.move.
+
+        Returns:
+            bool: True if the car is still playing.
+        """
+        moved = self._move(car, action, lane_move)  # update the head
+
+        # increment time
+        self.time += 1
+
+        # Check if the action was possible
+        if isinstance(moved, Problem):
+            car.dead = True
+            return False
+
+        # Crash detection:
+        others = self._crash_candidates(car, car_order) if self.broad_phase \
+            else self.cars
+        for other_car in others:
+            if other_car != car:
+                # if overlap(car.pos, car.w, car.h,
+                #            other_car.pos, other_car.w, other_car.h):
+                if collision_check(car, other_car):
+                    self.total_crashes += 1
+                    self.crashes[car.direction] += 1
+                    print("___________________________________________________________________________")
+                    print(f"Frame = {self.time // len(self.cars)},  Crash: {self.total_crashes}")
+                    print(f"Direction = {car.direction},  Crash: {self.crashes[car.direction]}")
+                    print(f"First car {car.name} loc {car.loc} speed {car.speed}")
+                    for seg in car.res:
+                        print(seg)
+                    print(f"Second car {other_car.name} loc {other_car.loc} speed {other_car.speed}")
+                    for seg in other_car.res:
+                        print(seg)
+                    print("___________________________________________________________________________")
+                    car.dead = True
+                    other_car.dead = True
+                    continue
+
+        # Place new goal if the goal is reached
+        if reached_goal(car, car.goal):
+            car.score += 1
+            self._place_goals(car)
+
+        # Player won! The car keeps driving, other cars still have to see it
+        if car.score > WINNING_SCORE:
+            self.finished_cars.add(car)
+            return False
+
+        return True
+
+    @staticmethod
+    def _crash_candidates(car: Car, car_order: Dict[Car, int]) -> List[Car]:
+        """
+        Get the cars that can collide with a car: two cars can only collide if they share a segment, and every
+        car is registered in Segment.cars of the segments it occupies.
+
+        Args:
+            car (Car): The car.
+            car_order (Dict[Car, int]): The index of every car in the list of cars.
+
+        Returns:
+            List[Car]: The other cars on the segments occupied by the car, in the order of the list of cars.
+        """
+        candidates = {other_car for seg_info in car.get_size_segments() for other_car in seg_info.segment.cars}
+        candidates.discard(car)
+        return sorted(candidates, key=car_order.__getitem__)
+
+    def _move(self, car: Car, action: Tuple[int, int], lane_move: Optional[LaneMove] = None) -> bool:
         """
         Move the car based on the action.
 
         Args:
             car (Car): The car to move.
             action (Tuple[int, int]): The action to be executed.
+            lane_move (Optional[LaneMove]): The move planned with plan_lane_moves for this action, None to call
+                Car.move.
 
         Returns:
             bool: True if the action was successful, False otherwise.
         """
         acceleration, lane_change = action
         car.change_speed(acceleration)
+        if lane_move is not None:
+            apply_lane_move(car, lane_move)
+            return True
 
         action_worked = True
         if lane_change != 0:
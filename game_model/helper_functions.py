@@ -4,6 +4,7 @@ from typing import Optional, List
 import numpy as np
 
 from game_model.car import Car
+from game_model.car_store import CarStore, CarView
 from game_model.constants import *
 from game_model.road_network import Direction, Road, true_direction, Goal, Point
 from game_model.road_network import LaneSegment, CrossingSegment, Segment
@@ -68,7 +69,8 @@ def reached_goal(car: Car, goal: Goal) -> bool:
     return False
 
 
-def create_random_car(segments: List[Segment], cars: List[Car]) -> Car:
+def create_random_car(segments: List[Segment], cars: List[Car], store: Optional[CarStore] = None,
+                      rng: random.Random = random) -> Car:
     """
     Create a random car that does not overlap with existing cars.
     Randomly selects a color, lane segment, speed, size. The location is set to 0.
@@ -76,6 +78,8 @@ def create_random_car(segments: List[Segment], cars: List[Car]) -> Car:
     Args:
         segments (List[Segment]): The list of segments to place the car in.
         cars (List[Car]): The list of existing cars.
+        store (Optional[CarStore]): If given, the car is a CarView over a new row of this store.
+        rng (random.Random): The random generator. Defaults to the global one.
 
     Returns:
         Car: The randomly created car.
@@ -96,16 +100,26 @@ def create_random_car(segments: List[Segment], cars: List[Car]) -> Car:
     #                       if not any([car.name == color for car in cars])])
     # color = colors[name]
 
-    lane_segment = random.choice([seg for seg in segments
+    lane_segment = rng.choice([seg for seg in segments
                                   if isinstance(seg, LaneSegment) and
                                   not any([seg == car.res[0].segment for car in cars])])
 
-    max_speed = random.randint(BLOCK_SIZE // 4, BLOCK_SIZE // 3)
-    speed = random.randint(BLOCK_SIZE // 10, max_speed)
+    max_speed = rng.randint(BLOCK_SIZE // 4, BLOCK_SIZE // 3)
+    speed = rng.randint(BLOCK_SIZE // 10, max_speed)
 
-    size = random.randint(BLOCK_SIZE // 2, 3 * BLOCK_SIZE // 2)
+    size = rng.randint(BLOCK_SIZE // 2, 3 * BLOCK_SIZE // 2)
     loc = 0
 
+    if store is not None:
+        return CarView(store,
+                       name=name,
+                       loc=loc,
+                       segment=lane_segment,
+                       speed=speed,
+                       size=size,
+                       color=color,
+                       max_speed=max_speed)
+
     return Car(name=name,
                loc=loc,
                segment=lane_segment,
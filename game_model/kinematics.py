@@ -0,0 +1,108 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from game_model.braking import braking_distances
+from game_model.car import Car
+from game_model.car_store import CarStore, CarView
+from game_model.constants import BLOCK_SIZE
+from game_model.road_network import LaneSegment, true_direction
+
+# The state of a car after a move within its lane segment: loc, the end of its reservation, its position x and y,
+# and its width and height
+LaneMove = Tuple[int, int, int, int, int, int]
+
+
+def plan_lane_moves(cars: Sequence[Car], speed: Optional[np.ndarray] = None,
+                    store: Optional[CarStore] = None) -> Dict[Car, LaneMove]:
+    """
+    Compute the moves of many cars that stay within the single lane segment they occupy, in one NumPy pass.
+
+    A car takes this fast path if it is alive, only reserves one lane segment, is not changing lanes and, after
+    moving, neither needs to extend its reservation nor enters the zone before the crossing where it asks for
+    priority. Such a move only depends on the state of the car itself, so it can be planned before any car moves
+    and applied with apply_lane_move at the turn of the car, with the same result as Car.move.
+
+    Args:
+        cars (Sequence[Car]): The cars.
+        speed (Optional[np.ndarray]): The speed every car moves with. Defaults to their current speeds.
+        store (Optional[CarStore]): If all cars are CarViews of this store, loc and size are read from its columns.
+
+    Returns:
+        Dict[Car, LaneMove]: The move of every car that takes the fast path.
+    """
+    if speed is None:
+        speed = np.array([car.speed for car in cars], dtype=np.int64)
+    keep = [i for i, car in enumerate(cars)
+            if len(car.res) == 1 and not car.dead and not car.changing_lane and not car.parallel_res
+            and not car.res[0].turn and isinstance(car.res[0].segment, LaneSegment)]
+    if not keep:
+        return {}
+    candidates = [cars[i] for i in keep]
+    speed = speed[keep]
+    if store is not None and all(isinstance(car, CarView) and car.row < len(store) and store.cars[car.row] is car
+                                 for car in candidates):
+        rows = np.array([car.row for car in candidates])
+        size = store.column("size")[rows]
+        loc = store.column("loc")[rows]
+    else:
+        size = np.array([car.size for car in candidates], dtype=np.int64)
+        loc = np.array([car.loc for car in candidates], dtype=np.int64)
+    seg_infos = [car.res[0] for car in candidates]
+    old_end = np.array([seg_info.end for seg_info in seg_infos])
+    length = np.array([seg_info.segment.length for seg_info in seg_infos])
+    begin = np.array([seg_info.segment.begin for seg_info in seg_infos])
+    sign = np.where([true_direction[seg_info.direction] for seg_info in seg_infos], 1, -1)
+    horizontal = np.array([seg_info.segment.lane.road.horizontal for seg_info in seg_infos])
+    top = np.array([seg_info.segment.lane.top for seg_info in seg_infos])
+
+    loc = loc + sign * speed
+    braking = braking_distances(speed, size)
+    stays = (np.abs(loc) + braking < length) & (length - np.abs(old_end) > length // 10)
+    end = sign * (np.maximum(size, braking) + np.abs(loc))
+    coordinate = begin + loc - np.where(sign > 0, 0, size)
+    x = np.where(horizontal, coordinate, top)
+    y = np.where(horizontal, top, coordinate)
+    w = np.where(horizontal, size - BLOCK_SIZE // 6, BLOCK_SIZE)
+    h = np.where(horizontal, BLOCK_SIZE, size - BLOCK_SIZE // 6)
+
+    return {car: move for car, stay, move in zip(candidates, stays.tolist(),
+                                                 zip(loc.tolist(), end.tolist(), x.tolist(), y.tolist(),
+                                                     w.tolist(), h.tolist()))
+            if stay}
+
+
+def apply_lane_move(car: Car, move: LaneMove) -> None:
+    """
+    Apply a move planned with plan_lane_moves, instead of calling Car.move.
+
+    Args:
+        car (Car): The car, still in the state the move was planned from.
+        move (LaneMove): The move.
+    """
+    loc, end, car.pos.x, car.pos.y, car.w, car.h = move
+    car.loc = loc
+    car.time += 1
+    seg_info = car.res[0]
+    seg_info.begin = loc
+    seg_info.end = end
+
+
+def move_cars(cars: Sequence[Car]) -> List[bool]:
+    """
+    Move many cars, with the same result as calling Car.move on each of them in order.
+
+    The cars taking the fast path of plan_lane_moves are moved by apply_lane_move, all other cars by Car.move.
+    The fast path only touches the state of the car itself, so it does not matter that these cars are moved
+    before the others.
+
+    Args:
+        cars (Sequence[Car]): The cars to move.
+
+    Returns:
+        List[bool]: The result of Car.move for every car.
+    """
+    moves = plan_lane_moves(cars)
+    for car, move in moves.items():
+        apply_lane_move(car, move)
+    return [True if car in moves else car.move() for car in cars]
@@ -0,0 +1,331 @@
+import multiprocessing
+import os
+import sys
+import traceback
+from typing import TYPE_CHECKING, Dict, List, Sequence, Set, Tuple
+
+from controller.astar_car_controller import AstarCarController
+from game_model.car import Car
+from game_model.decisions import Decision, make_decision, replay_side_effects
+from game_model.road_network import CrossingSegment, Intersection, LaneSegment, Segment, SegmentInfo
+
+if TYPE_CHECKING:
+    from game_model.game_model import TrafficEnv
+
+# A SegmentInfo with the id of its segment: segment id, begin, end, direction, turn
+SegmentInfoState = tuple
+# The state of a car a decision can look at, with segments replaced by their ids, see car_state
+CarState = tuple
+# The state a worker needs for the decisions of one tick: the indices and first_go flags of the controllers to
+# decide for, the states of the cars they can see by car index, the cars on the segments they can see, the crossing
+# times of the crossings and the priorities of the intersections among them
+RegionState = Tuple[List[Tuple[int, bool]], List[Tuple[int, CarState]], List[Tuple[int, List[int]]],
+                    List[Tuple[int, List[Tuple[int, int]]]], List[Tuple[int, List[Tuple[int, int]]]]]
+
+
+def segment_x(segment: Segment) -> float:
+    """
+    Get the horizontal position of the middle of a segment.
+
+    Args:
+        segment (Segment): The segment.
+
+    Returns:
+        float: The x coordinate.
+    """
+    if isinstance(segment, CrossingSegment):
+        return segment.vert_lane.top
+    if isinstance(segment, LaneSegment) and segment.road.horizontal:
+        return (segment.begin + segment.end) / 2
+    return segment.lane.top
+
+
+def partition_segments(segments: Sequence[Segment], regions: int) -> List[int]:
+    """
+    Split the map into vertical strips along the roads, with about the same number of segments each.
+
+    Segments are never split: a vertical road falls into one strip with all its lanes and crossings, and
+    horizontal roads are cut between their lane segments and crossings.
+
+    Args:
+        segments (Sequence[Segment]): The segments, indexed by their id.
+        regions (int): The number of strips.
+
+    Returns:
+        List[int]: The region of every segment, indexed by segment id.
+    """
+    counts: Dict[float, int] = {}
+    for segment in segments:
+        x = segment_x(segment)
+        counts[x] = counts.get(x, 0) + 1
+    region_of_x = {}
+    before = 0
+    for x in sorted(counts):
+        region_of_x[x] = min(regions - 1, before * regions // len(segments))
+        before += counts[x]
+    return [region_of_x[segment_x(segment)] for segment in segments]
+
+
+def car_state(car: Car) -> CarState:
+    """
+    Get the state of a car that decisions look at, with the segments replaced by their ids so it can be sent to a
+    worker process.
+
+    Args:
+        car (Car): The car.
+
+    Returns:
+        CarState: The state, to be passed to set_car_state.
+    """
+    return (car.speed, car.loc, car.direction, car.time, car.score, car._dead, car.changing_lane,
+            None if car.reserved_segment is None else (car.reserved_segment[0], car.reserved_segment[1].id),
+            [(seg_info.segment.id, seg_info.begin, seg_info.end, seg_info.direction, seg_info.turn)
+             for seg_info in car.res],
+            car.covered_length,
+            [(seg_info.segment.id, seg_info.begin, seg_info.end, seg_info.direction, seg_info.turn)
+             for seg_info in car.parallel_res],
+            car.goal.lane_segment.id, car.second_goal.lane_segment.id)
+
+
+def set_car_state(env: 'TrafficEnv', car: Car, state: CarState) -> None:
+    """
+    Set the state of a car of a replica to a state taken with car_state. The car is not registered on its segments.
+
+    Args:
+        env (TrafficEnv): The replica.
+        car (Car): The car.
+        state (CarState): The state.
+    """
+    segments = env.segments
+    (car.speed, car.loc, car.direction, car.time, car.score, car._dead, car.changing_lane, reserved_segment, res,
+     car.covered_length, parallel_res, goal, second_goal) = state
+    car.reserved_segment = None if reserved_segment is None else (reserved_segment[0], segments[reserved_segment[1]])
+    car.res = [SegmentInfo(segments[i], begin, end, direction, turn) for i, begin, end, direction, turn in res]
+    car.parallel_res = [SegmentInfo(segments[i], begin, end, direction, turn)
+                        for i, begin, end, direction, turn in parallel_res]
+    if car.goal.lane_segment is not segments[goal] or car.second_goal.lane_segment is not segments[second_goal]:
+        env._release_goals(car)
+        car.goal.lane_segment = segments[goal]
+        car.second_goal.lane_segment = segments[second_goal]
+        env._acquire_goals(car)
+    # The memo of get_next_segment is only valid for the time step it was filled in
+    car._next_segment_memo.clear()
+    car._next_segment_memo_time = -1
+
+
+def _serve(connection, env: 'TrafficEnv', region: int) -> None:
+    """
+    Decide for the cars in one region of a replica of the environment, in a worker process.
+    """
+    sys.stdout = open(os.devnull, "w")
+    cars = env.cars
+    while True:
+        command, data = connection.recv()
+        try:
+            if command == "decide":
+                deciding, car_states, segment_cars, crossing_times, priorities = data
+                for index, state in car_states:
+                    set_car_state(env, cars[index], state)
+                for segment_id, indices in segment_cars:
+                    env.segments[segment_id].cars = [cars[index] for index in indices]
+                for segment_id, times in crossing_times:
+                    env.segments[segment_id].time_to_leave = {cars[index]: time for index, time in times}
+                for intersection_id, times in priorities:
+                    env.intersections[intersection_id].priority = {cars[index]: time for index, time in times}
+                decisions = []
+                for index, first_go in deciding:
+                    controller = env.controllers[index]
+                    controller.first_go = first_go
+                    decisions.append(make_decision(index, controller))
+                connection.send(decisions)
+            else:
+                connection.close()
+                break
+        except Exception:
+            connection.send(RuntimeError(f"Region {region} failed:\n{traceback.format_exc()}"))
+            connection.close()
+            break
+
+
+class ReplicaPool:
+    """
+    A persistent pool of worker processes that make the decisions of a two-phase tick, each for the cars in one
+    region of the map.
+
+    Every worker is forked once with a replica of the environment, but only the part of it its decisions look at is
+    kept up to date. In every tick a car is assigned to the region of the segment its front is on. The decision of a
+    car reads the cars on the segments it reserved, on the lanes next to it, on the segments a lane change would
+    move it to, and on the route ahead up to the next lane segment. It also reads the crossing times and
+    intersection priorities on these segments. Before a worker decides, it receives just this part of the state
+    for the cars of its region. Cars inside the region are sent in full, and from the rest of the map only the cars
+    near its boundary are sent. The workers do not move any car. The environment applies all moves, so a tick
+    costs the workers nothing beyond their decisions. The results are the same as those of a two-phase tick in a
+    single process.
+
+    Routes are searched in the workers, so they must not depend on the cars outside the region, which rules out
+    "congestion" routing. Forking is needed to replicate the environment, see fork_available. After a reset the
+    cars of the replicas are stale, so the workers have to be closed and forked again.
+
+    Attributes:
+        regions (int): The number of worker processes, one per region.
+        region_of_segment (List[int]): The region of every segment, indexed by segment id.
+    """
+
+    def __init__(self, env: 'TrafficEnv', regions: int) -> None:
+        """
+        Fork the worker processes.
+
+        Args:
+            env (TrafficEnv): The environment, replicated into every worker.
+            regions (int): The number of worker processes and regions.
+        """
+        self.regions = regions
+        self.region_of_segment = partition_segments(env.segments, regions)
+        self._segments = env.segments
+        self._successors = env.network.successor_lists
+        self._ahead: Dict[int, List[Segment]] = {}
+        self._car_index = {car: index for index, car in enumerate(env.cars)}
+        self._controller_index = {controller: index for index, controller in enumerate(env.controllers)}
+        self._intersection_index = {intersection: index for index, intersection in enumerate(env.intersections)}
+        self._connections = []
+        self._processes = []
+        context = multiprocessing.get_context("fork")
+        for region in range(regions):
+            parent_connection, child_connection = context.Pipe()
+            process = context.Process(target=_serve, daemon=True, args=(child_connection, env, region))
+            process.start()
+            child_connection.close()
+            self._connections.append(parent_connection)
+            self._processes.append(process)
+
+    def _route_ahead(self, segment: Segment) -> List[Segment]:
+        """
+        Get the segments a route can take from a lane segment up to the next lane segment: the crossings behind it
+        and the lane segments leaving them.
+        """
+        ahead = self._ahead.get(segment.id)
+        if ahead is None:
+            ahead = []
+            seen = {segment.id}
+            stack = [segment.id]
+            while stack:
+                for successor in self._successors[stack.pop()]:
+                    if successor not in seen:
+                        seen.add(successor)
+                        ahead.append(self._segments[successor])
+                        if isinstance(self._segments[successor], CrossingSegment):
+                            stack.append(successor)
+            self._ahead[segment.id] = ahead
+        return ahead
+
+    def view(self, car: Car) -> Set[Segment]:
+        """
+        Get the segments the decision of a car can look at.
+
+        Args:
+            car (Car): The car.
+
+        Returns:
+            Set[Segment]: The segments.
+        """
+        seen = {seg_info.segment for seg_info in car.res}
+        seen.update(seg_info.segment for seg_info in car.parallel_res)
+        if car.reserved_segment is not None:
+            seen.add(car.reserved_segment[1])
+        ends = [car.res[-1].segment]
+        if car.parallel_res:
+            ends.append(car.parallel_res[-1].segment)
+        if isinstance(car.res[0].segment, LaneSegment):
+            for lane_diff in (1, -1):
+                adjacent = car.get_adjacent_lane_segment(lane_diff)
+                if adjacent is not None:
+                    seen.add(adjacent)
+                    ends.append(adjacent)
+        for end in ends:
+            if isinstance(end, LaneSegment):
+                seen.update(self._route_ahead(end))
+        return seen
+
+    def region_states(self, controllers: Sequence[AstarCarController]) -> List[RegionState]:
+        """
+        Split the deciding controllers by the region of their cars and collect the state every region needs.
+
+        Args:
+            controllers (Sequence[AstarCarController]): The controllers that decide.
+
+        Returns:
+            List[RegionState]: The state to send to the worker of every region.
+        """
+        deciding: List[List[Tuple[int, bool]]] = [[] for _ in range(self.regions)]
+        views: List[Set[Segment]] = [set() for _ in range(self.regions)]
+        for controller in controllers:
+            car = controller.car
+            region = self.region_of_segment[car.res[0].segment.id]
+            deciding[region].append((self._controller_index[controller], controller.first_go))
+            views[region].update(self.view(car))
+
+        car_index = self._car_index
+        car_states: Dict[Car, CarState] = {}
+        states = []
+        for region in range(self.regions):
+            segment_cars = []
+            crossing_times = []
+            intersections: Set[Intersection] = set()
+            visible: Dict[Car, None] = {}
+            for segment in views[region]:
+                segment_cars.append((segment.id, [car_index[car] for car in segment.cars]))
+                visible.update(dict.fromkeys(segment.cars))
+                if isinstance(segment, CrossingSegment):
+                    crossing_times.append((segment.id, [(car_index[car], time)
+                                                        for car, time in segment.time_to_leave.items()]))
+                    intersections.add(segment.intersection)
+            priorities = [(self._intersection_index[intersection],
+                           [(car_index[car], time) for car, time in intersection.priority.items()])
+                          for intersection in intersections]
+            for car in visible:
+                if car not in car_states:
+                    car_states[car] = car_state(car)
+            states.append((deciding[region], [(car_index[car], car_states[car]) for car in visible],
+                           segment_cars, crossing_times, priorities))
+        return states
+
+    def decide(self, env: 'TrafficEnv', controllers: Sequence[AstarCarController]) -> List[Decision]:
+        """
+        Let the workers decide for the cars of their regions and replay the side effects of get_action in the
+        environment.
+
+        Args:
+            env (TrafficEnv): The environment the workers were forked from.
+            controllers (Sequence[AstarCarController]): The controllers that decide, in order.
+
+        Returns:
+            List[Decision]: The decision of every controller.
+        """
+        for connection, state in zip(self._connections, self.region_states(controllers)):
+            connection.send(("decide", state))
+        decisions = []
+        for connection in self._connections:
+            result = connection.recv()
+            if isinstance(result, Exception):
+                self.close()
+                raise result
+            decisions.extend(result)
+        order = {self._controller_index[controller]: i for i, controller in enumerate(controllers)}
+        decisions.sort(key=lambda decision: order[decision[0]])
+        replay_side_effects(env, decisions)
+        return decisions
+
+    def close(self) -> None:
+        """
+        Stop the worker processes.
+        """
+        for connection in self._connections:
+            try:
+                connection.send(("close", None))
+            except (BrokenPipeError, OSError):
+                pass
+            connection.close()
+        for process in self._processes:
+            process.join()
+        self._connections = []
+        self._processes = []
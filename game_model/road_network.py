@@ -1,12 +1,12 @@
 from abc import ABC
 from dataclasses import dataclass
 from enum import Enum
-from typing import Optional, Dict, List
+from typing import Callable, Optional, Dict, List
 
 from game_model.constants import *
 
 
-@dataclass
+@dataclass(slots=True)
 class Point:
     x: int
     y: int
@@ -117,6 +117,8 @@ class Intersection:
         return f"Horizontal: {self.horizontal_road.name} - Vertical: {self.vertical_road.name} - Crossing Segments {len(self.segments)}"
 
 class Lane:
+    __slots__ = ("road", "num", "top", "direction", "segments")
+
     def __init__(self, road: Road, num: int, direction: Direction, top: int) -> None:
         """
         Initialize a Lane object.
@@ -135,6 +137,8 @@ class Lane:
 
 
 class Segment(ABC):
+    __slots__ = ("length", "cars", "max_speed", "id", "listener")
+
     def __init__(self) -> None:
         """
         Initialize a Segment object.
@@ -142,9 +146,37 @@ class Segment(ABC):
         self.length: int = 0
         self.cars: List['Car'] = []
         self.max_speed: int = 0
+        # Index of the segment in the list created by create_segments
+        self.id: Optional[int] = None
+        # Called with the segment whenever a car enters or leaves it (or its crossing times change)
+        self.listener: Optional[Callable[['Segment'], None]] = None
+
+    def add_car(self, car: 'Car') -> None:
+        """
+        Register a car on the segment.
+
+        Args:
+            car (Car): The car entering (or reserving) the segment.
+        """
+        self.cars.append(car)
+        if self.listener is not None:
+            self.listener(self)
+
+    def remove_car(self, car: 'Car') -> None:
+        """
+        Remove a car from the segment.
+
+        Args:
+            car (Car): The car leaving the segment.
+        """
+        self.cars.remove(car)
+        if self.listener is not None:
+            self.listener(self)
 
 
 class LaneSegment(Segment):
+    __slots__ = ("road", "lane", "begin", "end", "end_crossing", "num")
+
     def __init__(self, lane: Lane, begin: int, end: int) -> None:
         """
         Initialize a LaneSegment object.
@@ -175,6 +207,9 @@ class LaneSegment(Segment):
 
 
 class CrossingSegment(Segment):
+    __slots__ = ("horiz_lane", "vert_lane", "intersection", "connected_segments", "horiz_num", "vert_num",
+                 "time_to_leave", "time_to_enter")
+
     def __init__(self, horiz_lane: Lane, vert_lane: Lane, intersection: Intersection) -> None:
         """
         Initialize a CrossingSegment object.
@@ -200,6 +235,31 @@ class CrossingSegment(Segment):
         self.time_to_leave: dict['Car', int] = {}
         self.time_to_enter: dict['Car', int] = {}
 
+    def set_time_to_leave(self, car: 'Car', time_steps: int) -> None:
+        """
+        Set the number of time steps a car needs to leave the crossing.
+
+        Args:
+            car (Car): The car on the crossing.
+            time_steps (int): The number of time steps.
+        """
+        if self.time_to_leave.get(car) == time_steps:
+            return
+        self.time_to_leave[car] = time_steps
+        if self.listener is not None:
+            self.listener(self)
+
+    def pop_time_to_leave(self, car: 'Car') -> None:
+        """
+        Remove the time a car needs to leave the crossing.
+
+        Args:
+            car (Car): The car leaving the crossing.
+        """
+        self.time_to_leave.pop(car)
+        if self.listener is not None:
+            self.listener(self)
+
     def get_road(self, direction: Direction, opposite: bool = False) -> Road:
         """
         Get the road in the given direction.
@@ -222,6 +282,8 @@ class CrossingSegment(Segment):
 
 
 class SegmentInfo:
+    __slots__ = ("segment", "begin", "end", "direction", "turn")
+
     def __init__(self, segment: Segment, begin: int, end:int, direction: Direction, turn:bool=False) -> None:
         self.segment = segment
         self.begin = begin
@@ -234,6 +296,9 @@ class SegmentInfo:
 
 
 class Goal:
+    # batch is set by the GUI
+    __slots__ = ("pos", "lane_segment", "color", "batch")
+
     def __init__(self, lane_segment: LaneSegment, color: Color) -> None:
         """
         Initialize a Goal object.
@@ -0,0 +1,936 @@
+import heapq
+import itertools
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from game_model.compiled_network import CompiledNetwork
+from game_model.constants import BLOCK_SIZE, CROSSING_MAX_SPEED, LANE_DISPLACEMENT, MID_LANE
+from game_model.road_network import CrossingSegment, LaneSegment, Point, Segment
+
+
+def next_segments(segment: Segment) -> List[Segment]:
+    """
+    Get the segments that can be entered directly after the given segment.
+
+    Args:
+        segment (Segment): The segment to get the successors for.
+
+    Returns:
+        List[Segment]: The successor segments.
+    """
+    match segment:
+        case LaneSegment():
+            return [segment.end_crossing] if segment.end_crossing is not None else []
+        case CrossingSegment():
+            return [seg for seg in segment.connected_segments.values() if seg is not None]
+    return []
+
+
+def dist(p1: Point, p2: Point) -> float:
+    """
+    Calculate the Euclidean distance between two points.
+
+    Args:
+        p1 (Point): The first point.
+        p2 (Point): The second point.
+
+    Returns:
+        float: The Euclidean distance between the two points.
+    """
+    return math.hypot(p1.x - p2.x, p1.y - p2.y)
+
+
+def astar_heuristic(current_seg: Segment, goal_seg: LaneSegment) -> float:
+    """
+    Calculate the heuristic distance between the current segment and the goal segment for the A* algorithm.
+
+    Args:
+        current_seg (Segment): The current segment the car is on.
+        goal_seg (LaneSegment): The goal segment the car is trying to reach.
+
+    Returns:
+        float: The heuristic distance between the current segment and the goal segment.
+    """
+    match current_seg:
+        case LaneSegment():
+            if goal_seg.lane.road.horizontal:
+                if current_seg.lane.road.horizontal:
+                    return dist(Point(current_seg.end, current_seg.lane.top),
+                                Point(goal_seg.begin, goal_seg.lane.top))
+                else:
+                    return dist(Point(current_seg.lane.top, current_seg.end),
+                                Point(goal_seg.begin, goal_seg.lane.top))
+            else:
+                if current_seg.lane.road.horizontal:
+                    return dist(Point(current_seg.end, current_seg.lane.top),
+                                Point(goal_seg.lane.top, goal_seg.begin))
+                else:
+                    return dist(Point(current_seg.lane.top, current_seg.end),
+                                Point(goal_seg.lane.top, goal_seg.begin))
+        case CrossingSegment():
+            if goal_seg.lane.road.horizontal:
+                return dist(Point(current_seg.horiz_lane.top + MID_LANE, current_seg.vert_lane.top + MID_LANE),
+                            Point(goal_seg.begin, goal_seg.lane.top))
+            else:
+                return dist(Point(current_seg.horiz_lane.top + MID_LANE, current_seg.vert_lane.top + MID_LANE),
+                            Point(goal_seg.lane.top, goal_seg.begin))
+
+
+def reconstruct_path(came_from: Dict[Segment, Segment], current: Segment) -> List[Segment]:
+    """
+    Reconstruct the path from the start segment to the goal segment using the came_from map.
+
+    Args:
+        came_from (Dict[Segment, Segment]): A dictionary mapping each segment to the segment it came from.
+        current (Segment): The current segment (goal segment).
+
+    Returns:
+        List[Segment]: The reconstructed path from the start segment to the goal segment.
+    """
+    path: list[Segment] = [current]
+    while current in came_from:
+        current = came_from[current]
+        path.append(current)
+    path.reverse()
+    return path
+
+
+def fifo_search(start_seg: Segment, goal_seg: LaneSegment) -> Tuple[Optional[List[Segment]], int]:
+    """
+    Find a path between two segments in the order the original search of Car.astar used, which is the default
+    search of the cars.
+
+    The open list is a first-in, first-out queue: segments are expanded in the order they were reached, and a
+    segment is queued again whenever a cheaper path to it is found. The search stops as soon as the goal segment
+    is taken from the queue, so the path is the cheapest one found so far, not necessarily the shortest. The
+    original search also computed f-scores, but never ordered by them, so they are left out. A deque replaces the
+    list popped from the front, which keeps the order and therefore every path.
+
+    Args:
+        start_seg (Segment): The segment the search starts from.
+        goal_seg (LaneSegment): The segment the search tries to reach.
+
+    Returns:
+        Tuple[Optional[List[Segment]], int]: The path from start_seg to goal_seg (None if there is no path)
+            and the number of expanded segments.
+    """
+    open_queue = deque([start_seg])
+    came_from: dict[Segment, Segment] = {}
+    g_score: dict[Segment, int] = {start_seg: 0}
+    expanded = 0
+
+    while open_queue:
+        current_seg = open_queue.popleft()
+        if current_seg is goal_seg:
+            return reconstruct_path(came_from, current_seg), expanded
+
+        expanded += 1
+        tentative_g_score = g_score[current_seg] + current_seg.length
+        for neighbor in next_segments(current_seg):
+            if tentative_g_score < g_score.get(neighbor, float('inf')):
+                came_from[neighbor] = current_seg
+                g_score[neighbor] = tentative_g_score
+                open_queue.append(neighbor)
+
+    return None, expanded
+
+
+def astar_search(start_seg: Segment,
+                 goal_seg: LaneSegment,
+                 heuristic: Callable[[Segment, LaneSegment], float] = astar_heuristic
+                 ) -> Tuple[Optional[List[Segment]], int]:
+    """
+    Find the shortest path between two segments with a heap-based A* search.
+
+    Unlike fifo_search, the path is always a shortest one. Its paths differ from those of fifo_search wherever
+    fifo_search stops early on a longer path and wherever paths of equal cost are tied, so it is not used by the
+    cars. It is the reference for the path costs of the routers.
+
+    The cost of a path is the summed length of every segment on it except the goal segment. Stale heap
+    entries are skipped instead of being decreased in place (lazy decrease-key), and expanded segments are
+    kept in a closed set. A closed segment is only reopened if a strictly cheaper path to it is found, so
+    the search stays optimal for heuristics that are admissible but not consistent.
+
+    Args:
+        start_seg (Segment): The segment the search starts from.
+        goal_seg (LaneSegment): The segment the search tries to reach.
+        heuristic (Callable[[Segment, LaneSegment], float]): The heuristic estimating the remaining cost.
+
+    Returns:
+        Tuple[Optional[List[Segment]], int]: The path from start_seg to goal_seg (None if there is no path)
+            and the number of expanded segments.
+    """
+    tie_breaker = itertools.count()
+    open_heap = [(heuristic(start_seg, goal_seg), next(tie_breaker), 0, start_seg)]
+    came_from: dict[Segment, Segment] = {}
+    g_score: dict[Segment, int] = {start_seg: 0}
+    closed: set[Segment] = set()
+    expanded = 0
+
+    while open_heap:
+        _, _, current_g, current_seg = heapq.heappop(open_heap)
+        if current_seg in closed or current_g > g_score[current_seg]:
+            continue
+
+        if current_seg == goal_seg:
+            return reconstruct_path(came_from, current_seg), expanded
+
+        closed.add(current_seg)
+        expanded += 1
+
+        tentative_g_score = current_g + current_seg.length
+        for neighbor in next_segments(current_seg):
+            if tentative_g_score < g_score.get(neighbor, float('inf')):
+                came_from[neighbor] = current_seg
+                g_score[neighbor] = tentative_g_score
+                closed.discard(neighbor)
+                heapq.heappush(open_heap, (tentative_g_score + heuristic(neighbor, goal_seg),
+                                           next(tie_breaker),
+                                           tentative_g_score,
+                                           neighbor))
+
+    return None, expanded
+
+
+def reverse_dijkstra(network: CompiledNetwork, goal: int) -> Tuple[List[int], List[float]]:
+    """
+    Compute the shortest path tree of all segments towards a goal segment with a Dijkstra search on the
+    reversed segment graph. As in astar_search, leaving a segment costs its length.
+
+    Args:
+        network (CompiledNetwork): The compiled road network.
+        goal (int): The id of the goal segment.
+
+    Returns:
+        Tuple[List[int], List[float]]: For every segment the id of the next segment on its shortest path to the
+            goal (-1 for the goal and for segments that cannot reach it) and the cost of that path (inf if there
+            is none).
+    """
+    lengths = network.length.tolist()
+    predecessors = network.predecessor_lists
+    next_hop = [-1] * len(network)
+    distances = [float('inf')] * len(network)
+    distances[goal] = 0
+    open_heap = [(0, goal)]
+    while open_heap:
+        distance, current = heapq.heappop(open_heap)
+        if distance > distances[current]:
+            continue
+        for previous in predecessors[current]:
+            new_distance = distance + lengths[previous]
+            if new_distance < distances[previous]:
+                distances[previous] = new_distance
+                next_hop[previous] = current
+                heapq.heappush(open_heap, (new_distance, previous))
+    return next_hop, distances
+
+
+def dijkstra(network: CompiledNetwork, start: int) -> List[float]:
+    """
+    Compute the cost of the shortest path from a segment to every segment with a Dijkstra search. As in
+    astar_search, leaving a segment costs its length.
+
+    Args:
+        network (CompiledNetwork): The compiled road network.
+        start (int): The id of the start segment.
+
+    Returns:
+        List[float]: The cost from the start segment to every segment (inf if it cannot be reached).
+    """
+    lengths = network.length.tolist()
+    successors = network.successor_lists
+    distances = [float('inf')] * len(network)
+    distances[start] = 0
+    open_heap = [(0, start)]
+    while open_heap:
+        distance, current = heapq.heappop(open_heap)
+        if distance > distances[current]:
+            continue
+        new_distance = distance + lengths[current]
+        for neighbor in successors[current]:
+            if new_distance < distances[neighbor]:
+                distances[neighbor] = new_distance
+                heapq.heappush(open_heap, (new_distance, neighbor))
+    return distances
+
+
+class Router(ABC):
+    """
+    A routing backend answering shortest path queries between segments for the cars of an environment.
+    """
+
+    @abstractmethod
+    def route(self, start_seg: Segment, goal_seg: LaneSegment) -> Optional[List[Segment]]:
+        """
+        Find the shortest path between two segments.
+
+        Args:
+            start_seg (Segment): The segment the path starts from.
+            goal_seg (LaneSegment): The segment the path leads to.
+
+        Returns:
+            Optional[List[Segment]]: The path from start_seg to goal_seg, or None if there is no path.
+        """
+        pass
+
+    def acquire_goal(self, goal_seg: LaneSegment) -> None:
+        """
+        Notify the router that a car is heading to a goal segment. Does nothing by default.
+
+        Args:
+            goal_seg (LaneSegment): The goal segment.
+        """
+        pass
+
+    def release_goal(self, goal_seg: LaneSegment) -> None:
+        """
+        Notify the router that a car is no longer heading to a goal segment. Does nothing by default.
+
+        Args:
+            goal_seg (LaneSegment): The goal segment.
+        """
+        pass
+
+    def segment_changed(self, segment: Segment) -> None:
+        """
+        Notify the router that a car entered or left a segment. Does nothing by default.
+
+        Args:
+            segment (Segment): The segment.
+        """
+        pass
+
+
+class AstarRouter(Router):
+    """
+    A* search on the compiled road network, shared by all cars of an environment.
+
+    The heuristic is the straight-line distance from the exit of a segment to the entry of the goal segment.
+    It is computed for all segments at once with one array operation per goal segment, and the resulting
+    vectors are kept in a bounded LRU cache, so every car heading to the same goal segment reuses them.
+
+    Attributes:
+        network (CompiledNetwork): The compiled road network.
+        heuristic_cache_size (int): The maximum number of cached heuristic vectors.
+        expanded_nodes (int): The number of segments expanded by all searches.
+        searches (int): The number of searches.
+    """
+
+    def __init__(self, network: CompiledNetwork, heuristic_cache_size: int = 256) -> None:
+        """
+        Initialize the AstarRouter.
+
+        Args:
+            network (CompiledNetwork): The compiled road network.
+            heuristic_cache_size (int): The maximum number of cached heuristic vectors.
+        """
+        self.network: CompiledNetwork = network
+        self.heuristic_cache_size: int = heuristic_cache_size
+        self.expanded_nodes: int = 0
+        self.searches: int = 0
+        self._lengths: List[int] = network.length.tolist()
+        self._heuristics: OrderedDict[int, List[float]] = OrderedDict()
+
+    def compute_heuristic(self, goal: int) -> np.ndarray:
+        """
+        Compute the heuristic of every segment towards a goal segment.
+
+        Crossings are BLOCK_SIZE long but consecutive crossings are LANE_DISPLACEMENT apart, so the distances are
+        scaled down accordingly to never overestimate the cost of a path.
+
+        Args:
+            goal (int): The id of the goal segment.
+
+        Returns:
+            np.ndarray: The heuristic of every segment.
+        """
+        network = self.network
+        heuristic = np.hypot(network.end_x - network.begin_x[goal], network.end_y - network.begin_y[goal])
+        heuristic *= BLOCK_SIZE / (BLOCK_SIZE + LANE_DISPLACEMENT)
+        heuristic[goal] = 0
+        return heuristic
+
+    def heuristic(self, goal: int) -> List[float]:
+        """
+        Get the cached heuristic vector towards a goal segment, computing it if needed.
+
+        Args:
+            goal (int): The id of the goal segment.
+
+        Returns:
+            List[float]: The heuristic of every segment, indexed by segment id.
+        """
+        if goal in self._heuristics:
+            self._heuristics.move_to_end(goal)
+            return self._heuristics[goal]
+        heuristic = self.compute_heuristic(goal).tolist()
+        self._heuristics[goal] = heuristic
+        if len(self._heuristics) > self.heuristic_cache_size:
+            self._heuristics.popitem(last=False)
+        return heuristic
+
+    def search(self, start: int, goal: int) -> Optional[List[int]]:
+        """
+        Find the shortest path between two segment ids with a heap-based A* search, as in astar_search.
+
+        Args:
+            start (int): The id of the start segment.
+            goal (int): The id of the goal segment.
+
+        Returns:
+            Optional[List[int]]: The ids of the segments on the path, or None if there is no path.
+        """
+        heuristic = self.heuristic(goal)
+        successors = self.network.successor_lists
+        lengths = self._lengths
+        tie_breaker = itertools.count()
+        # Among entries with equal f-score the deepest one is expanded first
+        open_heap = [(heuristic[start], 0, next(tie_breaker), start)]
+        came_from: dict[int, int] = {}
+        g_score: dict[int, int] = {start: 0}
+        closed: set[int] = set()
+        self.searches += 1
+
+        while open_heap:
+            _, negative_g, _, current = heapq.heappop(open_heap)
+            current_g = -negative_g
+            if current in closed or current_g > g_score[current]:
+                continue
+
+            if current == goal:
+                path = [current]
+                while current in came_from:
+                    current = came_from[current]
+                    path.append(current)
+                path.reverse()
+                return path
+
+            closed.add(current)
+            self.expanded_nodes += 1
+
+            tentative_g_score = current_g + lengths[current]
+            for neighbor in successors[current]:
+                if tentative_g_score < g_score.get(neighbor, float('inf')) and heuristic[neighbor] != float('inf'):
+                    came_from[neighbor] = current
+                    g_score[neighbor] = tentative_g_score
+                    closed.discard(neighbor)
+                    heapq.heappush(open_heap, (tentative_g_score + heuristic[neighbor],
+                                               -tentative_g_score,
+                                               next(tie_breaker),
+                                               neighbor))
+        return None
+
+    def route(self, start_seg: Segment, goal_seg: LaneSegment) -> Optional[List[Segment]]:
+        """
+        Find the shortest path between two segments.
+
+        Args:
+            start_seg (Segment): The segment the path starts from.
+            goal_seg (LaneSegment): The segment the path leads to.
+
+        Returns:
+            Optional[List[Segment]]: The path from start_seg to goal_seg, or None if there is no path.
+        """
+        path = self.search(start_seg.id, goal_seg.id)
+        if path is None:
+            return None
+        segments = self.network.segments
+        return [segments[segment_id] for segment_id in path]
+
+    def __str__(self) -> str:
+        return f"{type(self).__name__}: {self.searches} searches, {self.expanded_nodes} expanded segments"
+
+
+class CongestionRouter(AstarRouter):
+    """
+    A* search on the compiled road network with edge weights that include the live occupancy of the segments.
+
+    Leaving a segment costs its length plus car_cost for every car on (or reserving) it, and leaving a crossing
+    additionally costs wait_cost for every time step until the last car on it has left, as given by
+    CrossingSegment.time_to_leave. Weights never drop below the length, so the straight-line heuristic stays
+    admissible. The segments report changes through segment_changed, and only the weights of the changed segments
+    are recomputed before the next search, so rerouting never rescans the network.
+
+    Attributes:
+        car_cost (int): The extra cost of a segment per car on it.
+        wait_cost (int): The extra cost of a crossing per time step until it is cleared.
+        updated_weights (int): The number of weights recomputed.
+    """
+
+    def __init__(self, network: CompiledNetwork, car_cost: int = BLOCK_SIZE, wait_cost: int = CROSSING_MAX_SPEED,
+                 heuristic_cache_size: int = 256) -> None:
+        """
+        Initialize the CongestionRouter with the current occupancy of the network.
+
+        Args:
+            network (CompiledNetwork): The compiled road network.
+            car_cost (int): The extra cost of a segment per car on it.
+            wait_cost (int): The extra cost of a crossing per time step until it is cleared.
+            heuristic_cache_size (int): The maximum number of cached heuristic vectors.
+        """
+        super().__init__(network, heuristic_cache_size)
+        self.car_cost: int = car_cost
+        self.wait_cost: int = wait_cost
+        self.updated_weights: int = 0
+        self._base_lengths: List[int] = network.length.tolist()
+        self._changed: set[int] = set(range(len(network)))
+
+    def segment_changed(self, segment: Segment) -> None:
+        """
+        Mark the weight of a segment as outdated.
+
+        Args:
+            segment (Segment): The segment a car entered or left.
+        """
+        self._changed.add(segment.id)
+
+    def weight(self, segment_id: int) -> int:
+        """
+        Get the current cost of leaving a segment.
+
+        Args:
+            segment_id (int): The id of the segment.
+
+        Returns:
+            int: The cost.
+        """
+        self._update_weights()
+        return self._lengths[segment_id]
+
+    def _update_weights(self) -> None:
+        """
+        Recompute the weights of the segments changed since the last search.
+        """
+        segments = self.network.segments
+        for segment_id in self._changed:
+            segment = segments[segment_id]
+            weight = self._base_lengths[segment_id] + self.car_cost * len(segment.cars)
+            if isinstance(segment, CrossingSegment) and segment.time_to_leave:
+                weight += self.wait_cost * max(segment.time_to_leave.values())
+            self._lengths[segment_id] = weight
+        self.updated_weights += len(self._changed)
+        self._changed.clear()
+
+    def search(self, start: int, goal: int) -> Optional[List[int]]:
+        """
+        Find the cheapest path between two segment ids under the current occupancy.
+
+        Args:
+            start (int): The id of the start segment.
+            goal (int): The id of the goal segment.
+
+        Returns:
+            Optional[List[int]]: The ids of the segments on the path, or None if there is no path.
+        """
+        self._update_weights()
+        return super().search(start, goal)
+
+    def __str__(self) -> str:
+        return f"{super().__str__()}, {self.updated_weights} updated weights"
+
+
+class LandmarkRouter(AstarRouter):
+    """
+    A* search with landmark (ALT) lower bounds, for large maps where one-way lanes force long detours.
+
+    K landmark segments are picked by farthest selection, and the shortest path costs from each landmark to all
+    segments and from all segments to each landmark are precomputed on the directed segment graph. By the
+    triangle inequality, d(v, goal) >= d(l, goal) - d(l, v) and d(v, goal) >= d(v, l) - d(goal, l) for every
+    landmark l. The heuristic is the largest of these bounds and of the straight-line distance.
+
+    Attributes:
+        landmarks (List[int]): The ids of the landmark segments.
+        from_landmarks (np.ndarray): from_landmarks[k, v] is the cost from landmark k to segment v.
+        to_landmarks (np.ndarray): to_landmarks[k, v] is the cost from segment v to landmark k.
+        build_time (float): The time in seconds it took to pick the landmarks and compute their distances.
+    """
+
+    def __init__(self, network: CompiledNetwork, landmarks: int = 8, heuristic_cache_size: int = 256) -> None:
+        """
+        Pick the landmarks and precompute their distances.
+
+        Args:
+            network (CompiledNetwork): The compiled road network.
+            landmarks (int): The number of landmarks K.
+            heuristic_cache_size (int): The maximum number of cached heuristic vectors.
+        """
+        super().__init__(network, heuristic_cache_size)
+        start_time = time.perf_counter()
+        n = len(network)
+        self.landmarks: List[int] = []
+        from_landmarks = []
+        to_landmarks = []
+        # Farthest selection: the next landmark is the segment farthest from all landmarks picked so far
+        closest = np.full(n, np.inf)
+        candidate = 0
+        for _ in range(min(landmarks, n)):
+            self.landmarks.append(candidate)
+            from_landmarks.append(dijkstra(network, candidate))
+            to_landmarks.append(reverse_dijkstra(network, candidate)[1])
+            round_trip = np.asarray(from_landmarks[-1]) + np.asarray(to_landmarks[-1])
+            closest = np.minimum(closest, np.where(np.isfinite(round_trip), round_trip, 0))
+            closest[self.landmarks] = -1
+            candidate = int(np.argmax(closest))
+        self.from_landmarks: np.ndarray = np.array(from_landmarks, dtype=float).reshape(-1, n)
+        self.to_landmarks: np.ndarray = np.array(to_landmarks, dtype=float).reshape(-1, n)
+        self.build_time: float = time.perf_counter() - start_time
+
+    @property
+    def memory(self) -> int:
+        """
+        The memory used by the landmark distances in bytes.
+        """
+        return self.from_landmarks.nbytes + self.to_landmarks.nbytes
+
+    def compute_heuristic(self, goal: int) -> np.ndarray:
+        """
+        Compute the landmark lower bound of every segment towards a goal segment.
+
+        A segment gets an infinite heuristic if a landmark proves that it cannot reach the goal.
+
+        Args:
+            goal (int): The id of the goal segment.
+
+        Returns:
+            np.ndarray: The heuristic of every segment.
+        """
+        with np.errstate(invalid="ignore"):
+            forward = self.from_landmarks[:, goal, None] - self.from_landmarks
+            backward = self.to_landmarks - self.to_landmarks[:, goal, None]
+        bounds = np.nan_to_num(np.fmax(forward, backward), nan=0.0, posinf=np.inf, neginf=0.0)
+        heuristic = np.maximum(bounds.max(axis=0, initial=0.0), super().compute_heuristic(goal))
+        heuristic[goal] = 0
+        return heuristic
+
+    def __str__(self) -> str:
+        return f"{super().__str__()}, {len(self.landmarks)} landmarks built in {self.build_time:.3f} s, " \
+               f"{self.memory / 1024:.1f} KiB"
+
+
+class RoutingTable(Router):
+    """
+    An all-pairs next-hop table over the segments of a road network.
+
+    The road network does not change during a run, so the shortest path from every segment to every other
+    segment can be computed once. Routing is then a walk along the stored next hops, bounded by the length
+    of the path. The table needs one entry per pair of segments, so build_time and memory should be checked
+    before enabling it on large maps.
+
+    Attributes:
+        network (CompiledNetwork): The compiled road network.
+        next_hop (np.ndarray): next_hop[i, j] is the id of the segment following segment i on the shortest
+            path to segment j, or -1 if j cannot be reached from i.
+        build_time (float): The time in seconds it took to build the table.
+    """
+
+    def __init__(self, network: CompiledNetwork) -> None:
+        """
+        Build the routing table with one reverse Dijkstra search per segment.
+
+        Args:
+            network (CompiledNetwork): The compiled road network.
+        """
+        start_time = time.perf_counter()
+        self.network: CompiledNetwork = network
+        n = len(network)
+        self.next_hop: np.ndarray = np.full((n, n), -1, dtype=np.int16 if n < 2 ** 15 else np.int32)
+        for goal in range(n):
+            self.next_hop[:, goal] = reverse_dijkstra(network, goal)[0]
+        self.build_time: float = time.perf_counter() - start_time
+
+    @property
+    def memory(self) -> int:
+        """
+        The memory used by the next-hop table in bytes.
+        """
+        return self.next_hop.nbytes
+
+    def route(self, start_seg: Segment, goal_seg: LaneSegment) -> Optional[List[Segment]]:
+        """
+        Look up the shortest path between two segments.
+
+        Args:
+            start_seg (Segment): The segment the path starts from.
+            goal_seg (LaneSegment): The segment the path leads to.
+
+        Returns:
+            Optional[List[Segment]]: The path from start_seg to goal_seg, or None if there is no path.
+        """
+        current = start_seg.id
+        goal = goal_seg.id
+        path = [start_seg]
+        while current != goal:
+            current = self.next_hop[current, goal]
+            if current < 0:
+                return None
+            path.append(self.network.segments[current])
+        return path
+
+    def __str__(self) -> str:
+        return f"RoutingTable: {len(self.network)} segments, built in {self.build_time:.3f} s, " \
+               f"{self.memory / 1024:.1f} KiB"
+
+
+class ShortestPathTrees(Router):
+    """
+    Shortest path trees towards the goal segments of the cars, shared by all cars of an environment.
+
+    The tree of a goal segment is built lazily with one reverse Dijkstra search the first time a route to it is
+    requested, and stores for every segment the id of the next segment on its shortest path to the goal. A route
+    is then read hop by hop. The environment reports the goal and second goal of every car with acquire_goal and
+    release_goal, and the tree of a goal segment is dropped when no car heads to it any more. The trees are kept
+    within max_memory bytes by evicting the least recently used ones, which are rebuilt if they are needed again.
+
+    Attributes:
+        network (CompiledNetwork): The compiled road network.
+        max_memory (int): The maximum memory used by the trees in bytes.
+        memory (int): The memory used by the trees in bytes.
+        trees_built (int): The number of reverse Dijkstra searches.
+        hits (int): The number of queries answered by an existing tree.
+    """
+
+    def __init__(self, network: CompiledNetwork, max_memory: int = 64 * 2 ** 20) -> None:
+        """
+        Initialize the ShortestPathTrees.
+
+        Args:
+            network (CompiledNetwork): The compiled road network.
+            max_memory (int): The maximum memory used by the trees in bytes. At least one tree is always kept.
+        """
+        self.network: CompiledNetwork = network
+        self.max_memory: int = max_memory
+        self.trees_built: int = 0
+        self.hits: int = 0
+        self._dtype = np.int16 if len(network) < 2 ** 15 else np.int32
+        self._trees: OrderedDict[int, np.ndarray] = OrderedDict()
+        self._references: Dict[int, int] = {}
+        self.memory: int = 0
+
+    def tree(self, goal: int) -> np.ndarray:
+        """
+        Get the shortest path tree towards a goal segment, building it if needed.
+
+        Args:
+            goal (int): The id of the goal segment.
+
+        Returns:
+            np.ndarray: The id of the next segment on the shortest path to the goal for every segment, -1 for the
+                goal and for segments that cannot reach it.
+        """
+        tree = self._trees.get(goal)
+        if tree is not None:
+            self.hits += 1
+            self._trees.move_to_end(goal)
+            return tree
+
+        tree = np.array(reverse_dijkstra(self.network, goal)[0], dtype=self._dtype)
+        self.trees_built += 1
+        self._trees[goal] = tree
+        self.memory += tree.nbytes
+        while len(self._trees) > 1 and self.memory > self.max_memory:
+            self.memory -= self._trees.popitem(last=False)[1].nbytes
+        return tree
+
+    def route(self, start_seg: Segment, goal_seg: LaneSegment) -> Optional[List[Segment]]:
+        """
+        Read the shortest path between two segments from the tree of the goal segment.
+
+        Args:
+            start_seg (Segment): The segment the path starts from.
+            goal_seg (LaneSegment): The segment the path leads to.
+
+        Returns:
+            Optional[List[Segment]]: The path from start_seg to goal_seg, or None if there is no path.
+        """
+        tree = self.tree(goal_seg.id)
+        current = start_seg.id
+        goal = goal_seg.id
+        path = [start_seg]
+        while current != goal:
+            current = int(tree[current])
+            if current < 0:
+                return None
+            path.append(self.network.segments[current])
+        return path
+
+    def acquire_goal(self, goal_seg: LaneSegment) -> None:
+        """
+        Count a car heading to a goal segment.
+
+        Args:
+            goal_seg (LaneSegment): The goal segment.
+        """
+        self._references[goal_seg.id] = self._references.get(goal_seg.id, 0) + 1
+
+    def release_goal(self, goal_seg: LaneSegment) -> None:
+        """
+        Stop counting a car heading to a goal segment, and drop its tree if no car heads to it any more.
+
+        Args:
+            goal_seg (LaneSegment): The goal segment.
+        """
+        references = self._references.get(goal_seg.id, 0) - 1
+        if references > 0:
+            self._references[goal_seg.id] = references
+        else:
+            self._references.pop(goal_seg.id, None)
+            tree = self._trees.pop(goal_seg.id, None)
+            if tree is not None:
+                self.memory -= tree.nbytes
+
+    def __len__(self) -> int:
+        return len(self._trees)
+
+    def __str__(self) -> str:
+        return f"ShortestPathTrees: {len(self._trees)} trees ({self.memory / 1024:.1f} KiB), " \
+               f"{len(self._references)} goals, {self.trees_built} built, {self.hits} hits"
+
+
+class RouteCache(Router):
+    """
+    A bounded, least-recently-used cache of routes shared by all cars of an environment.
+
+    Routes are keyed by (start segment, goal segment). Misses are answered by the wrapped router, or by
+    fifo_search, the search of Car.astar, if there is none. Cached routes can be dropped explicitly with invalidate, e.g. when the cost of
+    a segment changes.
+
+    Attributes:
+        maxsize (int): The maximum number of cached routes.
+        router (Optional[Router]): The router answering cache misses, None to use fifo_search.
+        hits (int): The number of queries answered from the cache.
+        misses (int): The number of queries passed on to the wrapped router.
+        expanded_nodes (int): The number of segments expanded by fifo_search on cache misses.
+    """
+
+    def __init__(self, maxsize: int, router: Optional[Router] = None) -> None:
+        """
+        Initialize the RouteCache.
+
+        Args:
+            maxsize (int): The maximum number of cached routes.
+            router (Optional[Router]): The router answering cache misses, None to use fifo_search.
+        """
+        if maxsize < 1:
+            raise ValueError(f"The route cache needs room for at least one route, got {maxsize}")
+        self.maxsize: int = maxsize
+        self.router: Optional[Router] = router
+        self.hits: int = 0
+        self.misses: int = 0
+        self.expanded_nodes: int = 0
+        self._routes: OrderedDict[Tuple[Segment, Segment], Optional[List[Segment]]] = OrderedDict()
+        self._routes_through: Dict[Segment, set[Tuple[Segment, Segment]]] = {}
+
+    def route(self, start_seg: Segment, goal_seg: LaneSegment) -> Optional[List[Segment]]:
+        """
+        Find the shortest path between two segments, answering from the cache if possible.
+
+        Args:
+            start_seg (Segment): The segment the path starts from.
+            goal_seg (LaneSegment): The segment the path leads to.
+
+        Returns:
+            Optional[List[Segment]]: A copy of the path from start_seg to goal_seg, or None if there is no path.
+        """
+        key = (start_seg, goal_seg)
+        if key in self._routes:
+            self.hits += 1
+            self._routes.move_to_end(key)
+            path = self._routes[key]
+        else:
+            self.misses += 1
+            if self.router is not None:
+                path = self.router.route(start_seg, goal_seg)
+            else:
+                path, expanded = fifo_search(start_seg, goal_seg)
+                self.expanded_nodes += expanded
+            self._store(key, path)
+        return list(path) if path is not None else None
+
+    def acquire_goal(self, goal_seg: LaneSegment) -> None:
+        """
+        Pass the goal segment on to the wrapped router.
+
+        Args:
+            goal_seg (LaneSegment): The goal segment.
+        """
+        if self.router is not None:
+            self.router.acquire_goal(goal_seg)
+
+    def release_goal(self, goal_seg: LaneSegment) -> None:
+        """
+        Pass the goal segment on to the wrapped router.
+
+        Args:
+            goal_seg (LaneSegment): The goal segment.
+        """
+        if self.router is not None:
+            self.router.release_goal(goal_seg)
+
+    def segment_changed(self, segment: Segment) -> None:
+        """
+        Drop the routes through a segment whose cost may have changed, and pass it on to the wrapped router.
+        Routes avoiding the segment stay cached even if it got cheaper, so traffic-dependent routers must not be
+        cached.
+
+        Args:
+            segment (Segment): The segment a car entered or left.
+        """
+        self.invalidate(segment)
+        if self.router is not None:
+            self.router.segment_changed(segment)
+
+    def invalidate(self, segment: Optional[Segment] = None) -> int:
+        """
+        Drop cached routes.
+
+        Args:
+            segment (Optional[Segment]): Drop only the routes starting at, ending at or passing through this
+                segment. Defaults to dropping every route.
+
+        Returns:
+            int: The number of dropped routes.
+        """
+        if segment is None:
+            dropped = len(self._routes)
+            self._routes.clear()
+            self._routes_through.clear()
+            return dropped
+
+        keys = list(self._routes_through.get(segment, ()))
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+
+    def _store(self, key: Tuple[Segment, Segment], path: Optional[List[Segment]]) -> None:
+        """
+        Store a route, evicting the least recently used routes if the cache is full.
+        """
+        self._routes[key] = path
+        # Routes without a path are indexed by their start and goal segment
+        for seg in path or key:
+            self._routes_through.setdefault(seg, set()).add(key)
+        while len(self._routes) > self.maxsize:
+            self._remove(next(iter(self._routes)))
+
+    def _remove(self, key: Tuple[Segment, Segment]) -> None:
+        """
+        Remove a route and its entries in the segment index.
+        """
+        path = self._routes.pop(key)
+        for seg in path or key:
+            keys = self._routes_through.get(seg)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._routes_through[seg]
+
+    def __len__(self) -> int:
+        return len(self._routes)
+
+    def __str__(self) -> str:
+        return f"RouteCache: {len(self._routes)}/{self.maxsize} routes, {self.hits} hits, {self.misses} misses"
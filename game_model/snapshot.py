@@ -0,0 +1,130 @@
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from game_model.car import Car
+from game_model.road_network import CrossingSegment, Direction, Intersection, LaneSegment, Segment, SegmentInfo
+
+if TYPE_CHECKING:
+    from game_model.game_model import TrafficEnv
+
+
+def _copy_seg_infos(seg_infos: List[SegmentInfo]) -> List[SegmentInfo]:
+    """
+    Copy a list of SegmentInfo objects, keeping the references to the segments.
+    """
+    return [SegmentInfo(seg_info.segment, seg_info.begin, seg_info.end, seg_info.direction, seg_info.turn)
+            for seg_info in seg_infos]
+
+
+class CarState:
+    """
+    The dynamic state of a car. Name, size, color, max_speed and router do not change and are not copied.
+    """
+
+    def __init__(self, car: Car) -> None:
+        self.speed: int = car.speed
+        self.loc: int = car.loc
+        self.direction: Direction = car.direction
+        self.time: int = car.time
+        self.score: int = car.score
+        self.dead: bool = car._dead
+        self.changing_lane: Optional[bool] = car.changing_lane
+        self.reserved_segment: Optional[Tuple[int, LaneSegment]] = car.reserved_segment
+        self.res: List[SegmentInfo] = _copy_seg_infos(car.res)
+        self.covered_length: int = car.covered_length
+        self.parallel_res: List[SegmentInfo] = _copy_seg_infos(car.parallel_res)
+        self.goal: Optional[LaneSegment] = car.goal.lane_segment if car.goal is not None else None
+        self.second_goal: Optional[LaneSegment] = car.second_goal.lane_segment if car.second_goal is not None else None
+        self.position: Tuple[int, int, int, int] = (car.pos.x, car.pos.y, car.w, car.h)
+
+    def restore(self, car: Car) -> None:
+        car.speed = self.speed
+        car.loc = self.loc
+        car.direction = self.direction
+        car.time = self.time
+        car.score = self.score
+        # Bypass the dead setter, the reservations are restored below
+        car._dead = self.dead
+        car.changing_lane = self.changing_lane
+        car.reserved_segment = self.reserved_segment
+        car.res = _copy_seg_infos(self.res)
+        car.covered_length = self.covered_length
+        car.parallel_res = _copy_seg_infos(self.parallel_res)
+        for goal, lane_segment in ((car.goal, self.goal), (car.second_goal, self.second_goal)):
+            if goal is not None and goal.lane_segment is not lane_segment:
+                goal.lane_segment = lane_segment
+                goal.update_position()
+        car.pos.x, car.pos.y, car.w, car.h = self.position
+        # The memo of get_next_segment is only valid for the time step it was filled in
+        car._next_segment_memo.clear()
+        car._next_segment_memo_time = -1
+
+
+class EnvSnapshot:
+    """
+    The dynamic state of a TrafficEnv, taken with TrafficEnv.snapshot and restored with TrafficEnv.restore.
+
+    Only the state that changes while the simulation runs is copied: the kinematics, reservations and goals of
+    the cars, the first_go flags of the controllers, the cars and crossing times registered on the segments, the
+    priorities of the intersections, the counters of the environment and the state of its random generator. The
+    road network, the cars and the controllers themselves are shared, so a snapshot can only be restored into the
+    environment it was taken from, as long as the environment was not reset in between.
+    """
+
+    def __init__(self, env: 'TrafficEnv') -> None:
+        self.cars: List[Car] = list(env.cars)
+        self.car_states: List[CarState] = [CarState(car) for car in env.cars]
+        self.first_go: List[bool] = [controller.first_go for controller in env.controllers]
+        self.segment_cars: List[Tuple[Segment, List[Car]]] = [(segment, segment.cars.copy())
+                                                               for segment in env.segments if segment.cars]
+        self.crossing_times: List[Tuple[CrossingSegment, Dict[Car, int], Dict[Car, int]]] = \
+            [(crossing, crossing.time_to_leave.copy(), crossing.time_to_enter.copy())
+             for crossing in env.segments
+             if isinstance(crossing, CrossingSegment) and (crossing.time_to_leave or crossing.time_to_enter)]
+        self.priorities: List[Tuple[Intersection, Dict[Car, int]]] = \
+            [(intersection, intersection.priority.copy()) for intersection in env.intersections
+             if intersection.priority]
+        self.time: int = env.time
+        self.total_crashes: int = env.total_crashes
+        self.crashes: Dict[Direction, int] = env.crashes.copy()
+        self.random_state: Any = env.random.getstate()
+
+    def restore(self, env: 'TrafficEnv') -> None:
+        if len(self.cars) != len(env.cars) or any(car is not other for car, other in zip(self.cars, env.cars)):
+            raise ValueError("The snapshot was taken from another environment or before a reset")
+
+        for car in env.cars:
+            env._release_goals(car)
+        for car, state in zip(env.cars, self.car_states):
+            state.restore(car)
+        for controller, first_go in zip(env.controllers, self.first_go):
+            controller.first_go = first_go
+        for car in env.cars:
+            env._acquire_goals(car)
+
+        # Without a router the cars search their routes themselves and nothing has to be notified
+        changed = env.router.segment_changed if env.router is not None else lambda segment: None
+        for segment in env.segments:
+            if segment.cars:
+                segment.cars.clear()
+                changed(segment)
+        for segment, cars in self.segment_cars:
+            segment.cars.extend(cars)
+            changed(segment)
+        for crossing in env.segments:
+            if isinstance(crossing, CrossingSegment) and (crossing.time_to_leave or crossing.time_to_enter):
+                crossing.time_to_leave.clear()
+                crossing.time_to_enter.clear()
+                changed(crossing)
+        for crossing, time_to_leave, time_to_enter in self.crossing_times:
+            crossing.time_to_leave.update(time_to_leave)
+            crossing.time_to_enter.update(time_to_enter)
+            changed(crossing)
+        for intersection in env.intersections:
+            intersection.priority.clear()
+        for intersection, priority in self.priorities:
+            intersection.priority.update(priority)
+
+        env.time = self.time
+        env.total_crashes = self.total_crashes
+        env.crashes = self.crashes.copy()
+        env.random.setstate(self.random_state)
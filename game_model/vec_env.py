@@ -0,0 +1,237 @@
+import copy
+import multiprocessing
+import traceback
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from game_model.compiled_network import CompiledNetwork
+from game_model.constants import N_ACTIONS
+from game_model.create_game import create_segments
+from game_model.game_model import TrafficEnv
+from game_model.road_network import Road
+
+StepResult = Tuple[np.ndarray, np.ndarray, np.ndarray, List[Dict[str, Any]]]
+
+_SCORE = TrafficEnv.observation_features.index("score")
+_DEAD = TrafficEnv.observation_features.index("dead")
+
+
+class _EnvGroup:
+    """
+    The environments of a VecTrafficEnv stepped by one process.
+    """
+
+    def __init__(self, roads: List[Road], players: int, seeds: Sequence[int], max_ticks: Optional[int],
+                 network: CompiledNetwork, env_kwargs: Dict[str, Any]) -> None:
+        self.envs = [TrafficEnv(roads=copy.deepcopy(roads), players=players, network=network, seed=seed, **env_kwargs)
+                     for seed in seeds]
+        self.max_ticks = max_ticks
+        self.ticks = [0] * len(self.envs)
+        self.observations = [env.get_observation() for env in self.envs]
+
+    def reset(self) -> np.ndarray:
+        for i, env in enumerate(self.envs):
+            self._reset(i)
+        return np.stack(self.observations)
+
+    def _reset(self, i: int) -> None:
+        self.envs[i].reset()
+        self.ticks[i] = 0
+        self.observations[i] = self.envs[i].get_observation()
+
+    def step(self, actions: Optional[np.ndarray]) -> StepResult:
+        rewards = []
+        dones = []
+        infos = []
+        for i, env in enumerate(self.envs):
+            if actions is None:
+                game_over = env.play_step()
+            else:
+                game_over = env.step([tuple(action) for action in actions[i].tolist()])
+            self.ticks[i] += 1
+            previous = self.observations[i]
+            observation = env.get_observation()
+            crashed = observation[:, _DEAD] > previous[:, _DEAD]
+            rewards.append(observation[:, _SCORE] - previous[:, _SCORE] - crashed)
+            self.observations[i] = observation
+
+            info: Dict[str, Any] = {}
+            if game_over:
+                info["end"] = "game_over"
+            elif env.is_deadlocked():
+                info["end"] = "deadlock"
+            elif self.max_ticks is not None and self.ticks[i] >= self.max_ticks:
+                info["end"] = "max_ticks"
+            if info:
+                info.update(ticks=self.ticks[i], crashes=env.total_crashes, total_score=int(observation[:, _SCORE].sum()),
+                            terminal_observation=observation)
+                self._reset(i)
+            dones.append(bool(info))
+            infos.append(info)
+        return np.stack(self.observations), np.stack(rewards), np.array(dones), infos
+
+
+def _worker(connection, group_args: tuple) -> None:
+    """
+    Serve the commands of a VecTrafficEnv for one group of environments in a worker process.
+
+    Once the group fails, every further command is answered with the exception, which the VecTrafficEnv raises.
+    """
+    error: Optional[Exception] = None
+    try:
+        group = _EnvGroup(*group_args)
+    except Exception:
+        error = RuntimeError(f"Environment worker failed:\n{traceback.format_exc()}")
+    while True:
+        command, data = connection.recv()
+        if command not in ("step", "reset"):
+            break
+        if error is None:
+            try:
+                result = group.step(data) if command == "step" else group.reset()
+            except Exception:
+                error = RuntimeError(f"Environment worker failed:\n{traceback.format_exc()}")
+        connection.send(result if error is None else error)
+    connection.close()
+
+
+class VecTrafficEnv:
+    """
+    Steps several TrafficEnvs of the same map in lockstep, for training policies.
+
+    The roads are compiled once and the environments share the arrays of the compiled network, which the routers
+    search. The segment graph itself is not shared: every environment builds its own roads, segments and
+    intersections with create_segments, since the segments hold the cars of their environment. Each environment
+    places its cars and goals with its own random generator (seeded seed, seed + 1, ...), so the results do not
+    depend on how the environments are spread over processes. With workers > 0 the environments are split over that many forked
+    worker processes, which step their environments at the same time. An exception in a worker is raised again by
+    the call waiting for it, after all workers were stopped.
+
+    Observations are stacked into an array of shape (num_envs, players, len(TrafficEnv.observation_features)).
+    The reward of a car is the increase of its score minus 1 if it crashed (or made an impossible move) in the
+    step. An environment is done when its game is over, all its cars are deadlocked or it ran max_ticks steps. It
+    is reset right away: the returned observation is that of the new episode, and the info of the environment holds
+    the end reason, the length, the crashes, the total score and the terminal observation of the finished one.
+
+    Attributes:
+        num_envs (int): The number of environments.
+        players (int): The number of players of every environment.
+        network (CompiledNetwork): The compiled network shared by the environments.
+        n_actions (int): The number of possible actions.
+    """
+
+    def __init__(self, roads: List[Road], players: int, num_envs: int, seed: int = 0, max_ticks: Optional[int] = None,
+                 workers: int = 0, **env_kwargs: Any) -> None:
+        """
+        Create the environments.
+
+        Args:
+            roads (List[Road]): The roads of the map, as in a scenario. They are copied for every environment.
+            players (int): The number of players of every environment.
+            num_envs (int): The number of environments.
+            seed (int): The seed of the first environment.
+            max_ticks (Optional[int]): The maximum length of an episode, None for no limit.
+            workers (int): The number of worker processes, 0 to step all environments in this process.
+            **env_kwargs: Passed on to every TrafficEnv, e.g. routing.
+        """
+        self.num_envs = num_envs
+        self.players = players
+        self.network = CompiledNetwork(*create_segments(copy.deepcopy(roads)))
+        self.n_actions = N_ACTIONS
+
+        seeds = [seed + i for i in range(num_envs)]
+        workers = min(workers, num_envs)
+        self._group: Optional[_EnvGroup] = None
+        self._connections = []
+        self._processes = []
+        self._group_sizes: List[int] = []
+        if workers <= 0:
+            self._group = _EnvGroup(roads, players, seeds, max_ticks, self.network, env_kwargs)
+            return
+
+        context = multiprocessing.get_context("fork")
+        for group_seeds in np.array_split(seeds, workers):
+            parent_connection, child_connection = context.Pipe()
+            group_args = (roads, players, group_seeds.tolist(), max_ticks, self.network, env_kwargs)
+            process = context.Process(target=_worker, args=(child_connection, group_args), daemon=True)
+            process.start()
+            child_connection.close()
+            self._connections.append(parent_connection)
+            self._processes.append(process)
+            self._group_sizes.append(len(group_seeds))
+
+    def reset(self) -> np.ndarray:
+        """
+        Reset all environments.
+
+        Returns:
+            np.ndarray: The observations of shape (num_envs, players, features).
+        """
+        if self._group is not None:
+            return self._group.reset()
+        for connection in self._connections:
+            connection.send(("reset", None))
+        return np.concatenate(self._receive())
+
+    def step(self, actions: Optional[np.ndarray] = None) -> StepResult:
+        """
+        Step all environments once.
+
+        Args:
+            actions (Optional[np.ndarray]): The (acceleration, lane change) action of every car, of shape
+                (num_envs, players, 2). Defaults to letting the AstarCarControllers of the environments decide.
+
+        Returns:
+            StepResult: The observations (num_envs, players, features), the rewards (num_envs, players), the done
+                flags (num_envs,) and the info dictionary of every environment.
+        """
+        if actions is not None:
+            actions = np.asarray(actions).reshape(self.num_envs, self.players, 2)
+        if self._group is not None:
+            return self._group.step(actions)
+
+        begin = 0
+        for connection, size in zip(self._connections, self._group_sizes):
+            connection.send(("step", None if actions is None else actions[begin:begin + size]))
+            begin += size
+        results = self._receive()
+        return (np.concatenate([result[0] for result in results]),
+                np.concatenate([result[1] for result in results]),
+                np.concatenate([result[2] for result in results]),
+                [info for result in results for info in result[3]])
+
+    def _receive(self) -> list:
+        """
+        Receive the answer of every worker process.
+
+        Raises:
+            RuntimeError: If a worker failed, with its traceback. All workers are stopped.
+        """
+        results = [connection.recv() for connection in self._connections]
+        for result in results:
+            if isinstance(result, Exception):
+                self.close()
+                raise result
+        return results
+
+    def close(self) -> None:
+        """
+        Stop the worker processes.
+        """
+        for connection in self._connections:
+            try:
+                connection.send(("close", None))
+            except (BrokenPipeError, OSError):
+                pass
+            connection.close()
+        for process in self._processes:
+            process.join()
+        self._connections = []
+        self._processes = []
+
+    def __enter__(self) -> 'VecTrafficEnv':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
@@ -0,0 +1,150 @@
+"""
+Headless batch runner: runs one scenario of scenarios/scenarios.py without the GUI and prints a JSON report.
+
+The simulation runs until the game is over, all cars are deadlocked or the tick budget is used up. The report
+contains the throughput (ticks and car moves per second of wall time), the crashes and the scores. Everything
+the simulation prints goes to stderr, so stdout only carries the report.
+
+Example:
+    python headless.py TWO_CROSSING --seed 1 --max-ticks 2000 --players 10 > report.json
+"""
+import argparse
+import contextlib
+import copy
+import json
+import random
+import sys
+import time
+from typing import Any, Dict, Optional
+
+from game_model.create_game import create_segments
+from game_model.game_model import TrafficEnv
+from game_model.road_network import LaneSegment
+from game_model.routing import RouteCache
+from scenarios import scenarios
+
+
+def get_scenarios() -> Dict[str, dict]:
+    """
+    Collect every scenario dictionary defined in scenarios/scenarios.py by name.
+    """
+    return {name: value for name, value in vars(scenarios).items()
+            if isinstance(value, dict) and "roads" in value}
+
+
+def run(scenario: str, seed: int = 0, max_ticks: int = 1000, players: Optional[int] = None,
+        fast_forward: bool = False, **env_kwargs: Any) -> Dict[str, Any]:
+    """
+    Run a scenario headless and measure it.
+
+    Args:
+        scenario (str): The name of the scenario in scenarios/scenarios.py.
+        seed (int): The seed of the random generator placing the cars and goals.
+        max_ticks (int): The maximum number of ticks (calls to TrafficEnv.play_step).
+        players (Optional[int]): The number of players. Defaults to the players of the scenario.
+        fast_forward (bool): If True, predictable ticks are skipped with TrafficEnv.fast_forward.
+        **env_kwargs: Passed on to TrafficEnv, e.g. routing or two_phase.
+
+    Returns:
+        Dict[str, Any]: The report of the run.
+    """
+    scenarios_by_name = get_scenarios()
+    if scenario not in scenarios_by_name:
+        raise ValueError(f"Unknown scenario {scenario}, expected one of {', '.join(scenarios_by_name)}")
+    roads = copy.deepcopy(scenarios_by_name[scenario]["roads"])
+    players = scenarios_by_name[scenario]["players"] if players is None else players
+    # create_random_car places every car on its own lane segment
+    lane_segments = sum(isinstance(seg, LaneSegment) for seg in create_segments(copy.deepcopy(roads))[0])
+    if players > lane_segments:
+        raise ValueError(f"{scenario} has room for at most {lane_segments} players, got {players}")
+
+    random.seed(seed)
+    start_time = time.perf_counter()
+    env = TrafficEnv(roads=roads, players=players, **env_kwargs)
+    setup_time = time.perf_counter() - start_time
+
+    ticks = 0
+    end = "max_ticks"
+    start_time = time.perf_counter()
+    steps = 0
+    while ticks < max_ticks:
+        if fast_forward:
+            advanced, game_over = env.fast_forward(max_ticks - ticks)
+        else:
+            advanced, game_over = 1, env.play_step()
+        ticks += advanced
+        steps += 1
+        if game_over:
+            end = "game_over"
+            break
+        if env.is_deadlocked():
+            end = "deadlock"
+            break
+    wall_time = time.perf_counter() - start_time
+
+    # TrafficEnv.time counts the moves of single cars
+    car_moves = env.time
+    # The precomputed routers know their build time and memory, also behind a route cache
+    router = env.router.router if isinstance(env.router, RouteCache) else env.router
+    return {
+        "scenario": scenario,
+        "seed": seed,
+        "players": players,
+        "segments": len(env.segments),
+        "lane_segments": lane_segments,
+        "options": dict(env_kwargs, fast_forward=fast_forward),
+        "end": end,
+        "ticks": ticks,
+        "skipped_ticks": ticks - steps,
+        "skipped_decisions": env.skipped_decisions,
+        "car_moves": car_moves,
+        "setup_time": setup_time,
+        "wall_time": wall_time,
+        "ticks_per_sec": ticks / wall_time if wall_time > 0 else None,
+        "car_moves_per_sec": car_moves / wall_time if wall_time > 0 else None,
+        "crashes": env.total_crashes,
+        "crashes_by_direction": {direction.name: count for direction, count in env.crashes.items()},
+        "dead_cars": len(env.dead_cars),
+        "finished_cars": len(env.finished_cars),
+        "total_score": sum(car.score for car in env.cars),
+        "scores": {car.name: car.score for car in env.cars},
+        "router": str(env.router),
+        "router_build_time": getattr(router, "build_time", None),
+        "router_memory": getattr(router, "memory", None),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("scenario", help="Name of the scenario in scenarios/scenarios.py")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--max-ticks", type=int, default=1000, help="Maximum number of ticks")
+    parser.add_argument("--players", type=int, default=None, help="Number of players (default: the scenario's)")
+    parser.add_argument("--routing", default="astar", help="Routing backend of TrafficEnv")
+    parser.add_argument("--route-cache-size", type=int, default=None, help="Size of the shared route cache")
+    parser.add_argument("--two-phase", action="store_true", help="Decide all actions before applying them")
+    parser.add_argument("--decision-workers", type=int, default=0, help="Processes for two-phase decisions")
+    parser.add_argument("--fast-forward", action="store_true", help="Skip ticks in which every car cruises")
+    parser.add_argument("--sleep", action="store_true", help="Skip the decisions of cars waiting for others")
+    parser.add_argument("--indent", type=int, default=None, help="Indent the JSON report")
+    args = parser.parse_args()
+
+    env_kwargs = {"routing": args.routing}
+    if args.route_cache_size is not None:
+        env_kwargs["route_cache_size"] = args.route_cache_size
+    if args.two_phase:
+        env_kwargs["two_phase"] = True
+        env_kwargs["decision_workers"] = args.decision_workers
+    if args.sleep:
+        env_kwargs["sleep"] = True
+
+    with contextlib.redirect_stdout(sys.stderr):
+        try:
+            report = run(args.scenario, args.seed, args.max_ticks, args.players, args.fast_forward, **env_kwargs)
+        except ValueError as error:
+            parser.error(str(error))
+    print(json.dumps(report, indent=args.indent))
+
+
+if __name__ == '__main__':
+    main()
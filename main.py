@@ -2,8 +2,10 @@ from scenarios.scenarios import *
 from controller.game_controller import GameController
 
 
-def main(players, roads, segmentation, gui=True, debug=False, test_mode=None):
-    controller = GameController(gui=gui, roads=roads, players=players, debug=debug, test_mode=test_mode)
+def main(players, roads, segmentation, gui=True, debug=False, test_mode=None, routing="astar",
+         route_cache_size=None):
+    controller = GameController(gui=gui, roads=roads, players=players, debug=debug, test_mode=test_mode, routing=routing,
+                                route_cache_size=route_cache_size)
     controller.start()
 
 if __name__ == '__main__':
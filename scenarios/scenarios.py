@@ -124,4 +124,28 @@ HORIZONTAL_VERTICAL = {
 }
 
 JUST_ONE_CAR = STARTING_SCENARIO.copy()
-JUST_ONE_CAR["players"] = 1
\ No newline at end of file
+JUST_ONE_CAR["players"] = 1
+
+def grid_scenario(horizontal: int, vertical: int, spacing: int = 5 * BLOCK_SIZE, lanes: int = 1, players: int = 0) -> dict:
+    """
+    Create a scenario with a grid of one-way roads of alternating directions. With an even number of horizontal
+    and vertical roads every lane segment can be reached from every other one.
+    Large grids do not fit in the window and are meant for headless runs and benchmarks.
+
+    Args:
+        horizontal (int): The number of horizontal roads.
+        vertical (int): The number of vertical roads.
+        spacing (int): The distance between the tops of neighbouring roads.
+        lanes (int): The number of lanes of each road.
+        players (int): The number of players.
+
+    Returns:
+        dict: The scenario dictionary.
+    """
+    roads = [Road(f"h{i}", True, i * spacing, lanes * (1 - i % 2), lanes * (i % 2)) for i in range(horizontal)] + \
+            [Road(f"v{i}", False, i * spacing, lanes * (1 - i % 2), lanes * (i % 2)) for i in range(vertical)]
+    return {
+        "roads": roads,
+        "segmentation": False,
+        "players": players
+    }
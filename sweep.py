@@ -0,0 +1,207 @@
+"""
+Monte Carlo sweep: runs scenarios of scenarios/scenarios.py headless for every combination of seed, scenario and
+player count, spread over a pool of worker processes.
+
+Every worker builds the environment of a scenario and player count once and only resets it with the seed of the
+next run, so the road network is not rebuilt for every run. A run is determined by its seed alone, not by the
+worker it lands on. The result of every run is appended to a JSON lines file as soon as it is done, and a summary
+per scenario and player count is printed as JSON at the end. Everything the simulation prints goes to stderr.
+
+Example:
+    python sweep.py TWO_CROSSING BIG_SCENARIO --seeds 100 --players 10 20 --workers 4 --output sweep.jsonl
+"""
+import argparse
+import contextlib
+import copy
+import json
+import multiprocessing
+import statistics
+import sys
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from game_model.create_game import create_segments
+from game_model.game_model import TrafficEnv
+from game_model.road_network import Direction, LaneSegment
+from headless import get_scenarios
+
+# The environments of a worker process by scenario and player count
+_envs: Dict[Tuple[str, int], TrafficEnv] = {}
+_env_kwargs: Dict[str, Any] = {}
+
+
+def _init_worker(env_kwargs: Dict[str, Any]) -> None:
+    """
+    Set the options of the environments created by a worker process.
+    """
+    global _env_kwargs
+    _env_kwargs = env_kwargs
+
+
+def _get_env(scenario: str, players: int) -> TrafficEnv:
+    """
+    Get the environment of a scenario and player count, creating it on the first run in this process.
+    """
+    key = (scenario, players)
+    if key not in _envs:
+        roads = copy.deepcopy(get_scenarios()[scenario]["roads"])
+        _envs[key] = TrafficEnv(roads=roads, players=players, seed=0, **_env_kwargs)
+    return _envs[key]
+
+
+def run_one(task: Tuple[str, int, int, int]) -> Dict[str, Any]:
+    """
+    Run one scenario with one seed.
+
+    Args:
+        task (Tuple[str, int, int, int]): The scenario, the number of players, the seed and the maximum number of ticks.
+
+    Returns:
+        Dict[str, Any]: The result of the run.
+    """
+    scenario, players, seed, max_ticks = task
+    with contextlib.redirect_stdout(sys.stderr):
+        env = _get_env(scenario, players)
+        env.reset(seed)
+        ticks = 0
+        end = "max_ticks"
+        start_time = time.perf_counter()
+        while ticks < max_ticks:
+            game_over = env.play_step()
+            ticks += 1
+            if game_over:
+                end = "game_over"
+                break
+            if env.is_deadlocked():
+                end = "deadlock"
+                break
+        wall_time = time.perf_counter() - start_time
+
+    return {
+        "scenario": scenario,
+        "players": players,
+        "seed": seed,
+        "end": end,
+        "ticks": ticks,
+        "wall_time": wall_time,
+        "crashes": env.total_crashes,
+        "crashes_by_direction": {direction.name: count for direction, count in env.crashes.items()},
+        "dead_cars": len(env.dead_cars),
+        "finished_cars": len(env.finished_cars),
+        "total_score": sum(car.score for car in env.cars),
+        "scores": [car.score for car in env.cars],
+    }
+
+
+def aggregate(results: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Summarize the results of the runs per scenario and player count.
+
+    Args:
+        results (Iterable[Dict[str, Any]]): The results of run_one.
+
+    Returns:
+        List[Dict[str, Any]]: The summary of every scenario and player count.
+    """
+    groups: Dict[Tuple[str, int], List[Dict[str, Any]]] = {}
+    for result in results:
+        groups.setdefault((result["scenario"], result["players"]), []).append(result)
+
+    def describe(values: List[float]) -> Dict[str, float]:
+        return {"mean": statistics.fmean(values), "stdev": statistics.pstdev(values),
+                "min": min(values), "max": max(values)}
+
+    summary = []
+    for (scenario, players), runs in sorted(groups.items()):
+        ends = [run["end"] for run in runs]
+        summary.append({
+            "scenario": scenario,
+            "players": players,
+            "runs": len(runs),
+            "ends": {end: ends.count(end) for end in sorted(set(ends))},
+            "deadlock_rate": ends.count("deadlock") / len(runs),
+            "ticks": describe([run["ticks"] for run in runs]),
+            "crashes": describe([run["crashes"] for run in runs]),
+            "crashes_by_direction": {direction.name: sum(run["crashes_by_direction"][direction.name] for run in runs)
+                                     for direction in Direction},
+            "total_score": describe([run["total_score"] for run in runs]),
+            "ticks_per_sec": sum(run["ticks"] for run in runs) / max(sum(run["wall_time"] for run in runs), 1e-9),
+        })
+    return summary
+
+
+def sweep(scenarios: List[str], seeds: Iterable[int], players: Optional[List[int]] = None, max_ticks: int = 1000,
+          workers: int = 1, output: Optional[str] = None, **env_kwargs: Any) -> List[Dict[str, Any]]:
+    """
+    Run every combination of scenario, player count and seed.
+
+    Args:
+        scenarios (List[str]): The names of the scenarios in scenarios/scenarios.py.
+        seeds (Iterable[int]): The seeds of the runs.
+        players (Optional[List[int]]): The player counts. Defaults to the players of each scenario.
+        max_ticks (int): The maximum number of ticks of a run.
+        workers (int): The number of worker processes, 0 to run everything in this process.
+        output (Optional[str]): A JSON lines file the result of every run is appended to as soon as it is done.
+        **env_kwargs: Passed on to TrafficEnv, e.g. routing.
+
+    Returns:
+        List[Dict[str, Any]]: The summary of every scenario and player count, see aggregate.
+    """
+    scenarios_by_name = get_scenarios()
+    tasks = []
+    for scenario in scenarios:
+        if scenario not in scenarios_by_name:
+            raise ValueError(f"Unknown scenario {scenario}, expected one of {', '.join(scenarios_by_name)}")
+        # create_random_car places every car on its own lane segment
+        lane_segments = sum(isinstance(seg, LaneSegment)
+                            for seg in create_segments(copy.deepcopy(scenarios_by_name[scenario]["roads"]))[0])
+        for player_count in players or [scenarios_by_name[scenario]["players"]]:
+            if player_count > lane_segments:
+                raise ValueError(f"{scenario} has room for at most {lane_segments} players, got {player_count}")
+            tasks.extend((scenario, player_count, seed, max_ticks) for seed in seeds)
+
+    results = []
+    with contextlib.ExitStack() as stack:
+        file = stack.enter_context(open(output, "a")) if output is not None else None
+        if workers > 0:
+            pool = stack.enter_context(multiprocessing.Pool(workers, _init_worker, (env_kwargs,)))
+            # Tasks of the same scenario are handed out in chunks, so workers reuse their environments
+            chunk_size = max(1, len(tasks) // (4 * workers))
+            runs = pool.imap_unordered(run_one, tasks, chunk_size)
+        else:
+            _init_worker(env_kwargs)
+            runs = map(run_one, tasks)
+        for result in runs:
+            results.append(result)
+            if file is not None:
+                file.write(json.dumps(result) + "\n")
+                file.flush()
+            print(f"{len(results)}/{len(tasks)} {result['scenario']} players={result['players']} "
+                  f"seed={result['seed']}: {result['end']} after {result['ticks']} ticks", file=sys.stderr)
+    return aggregate(results)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("scenarios", nargs="+", help="Names of the scenarios in scenarios/scenarios.py")
+    parser.add_argument("--seeds", type=int, default=10, help="Number of seeds per scenario and player count")
+    parser.add_argument("--first-seed", type=int, default=0, help="The first seed")
+    parser.add_argument("--players", type=int, nargs="+", default=None,
+                        help="Player counts (default: each scenario's)")
+    parser.add_argument("--max-ticks", type=int, default=1000, help="Maximum number of ticks per run")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count(), help="Worker processes")
+    parser.add_argument("--routing", default="astar", help="Routing backend of TrafficEnv")
+    parser.add_argument("--output", default=None, help="JSON lines file the result of every run is appended to")
+    parser.add_argument("--indent", type=int, default=None, help="Indent the JSON summary")
+    args = parser.parse_args()
+
+    try:
+        summary = sweep(args.scenarios, range(args.first_seed, args.first_seed + args.seeds), args.players,
+                        args.max_ticks, args.workers, args.output, routing=args.routing)
+    except ValueError as error:
+        parser.error(str(error))
+    print(json.dumps(summary, indent=args.indent))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+import copy
+import random
+
+import pytest
+
+from game_model.compiled_network import CompiledNetwork
+from game_model.create_game import create_segments
+from game_model.decisions import fork_available
+from game_model.game_model import TrafficEnv
+from game_model.road_network import LaneSegment
+from game_model.routing import AstarRouter, CongestionRouter, LandmarkRouter, RouteCache, RoutingTable, \
+    ShortestPathTrees, astar_search
+from scenarios.scenarios import BIG_SCENARIO, TWO_CROSSING, grid_scenario
+
+
+def path_cost(path):
+    # The cost of a path as in astar_search: every segment but the goal segment
+    return sum(segment.length for segment in path[:-1])
+
+
+def trace(env, ticks):
+    states = []
+    for _ in range(ticks):
+        game_over = env.play_step()
+        states.append(state(env))
+        if game_over:
+            break
+    return states
+
+
+def state(env):
+    return [(car.name, car.loc, car.speed, car.dead, car.score, car.time,
+             [(seg_info.segment.id, seg_info.begin, seg_info.end) for seg_info in car.res],
+             car.goal.lane_segment.id) for car in env.cars] + [env.time, env.total_crashes]
+
+
+def make_env(scenario, seed=3, **kwargs):
+    return TrafficEnv(roads=copy.deepcopy(scenario["roads"]), players=scenario["players"], seed=seed, **kwargs)
+
+
+@pytest.mark.parametrize("create_router", [
+    AstarRouter,
+    LandmarkRouter,
+    RoutingTable,
+    ShortestPathTrees,
+    CongestionRouter,
+    lambda network: RouteCache(64, AstarRouter(network)),
+])
+@pytest.mark.parametrize("roads", [BIG_SCENARIO["roads"], grid_scenario(4, 4, lanes=2)["roads"]])
+def test_router_costs_match_astar_search(create_router, roads):
+    segments, intersections = create_segments(copy.deepcopy(roads))
+    router = create_router(CompiledNetwork(segments, intersections))
+    lane_segments = [segment for segment in segments if isinstance(segment, LaneSegment)]
+    pairs = random.Random(0).sample([(start, goal) for start in lane_segments for goal in lane_segments], 200)
+    for start, goal in pairs:
+        expected, _ = astar_search(start, goal)
+        path = router.route(start, goal)
+        if expected is None:
+            assert path is None
+        else:
+            assert path[0] is start and path[-1] is goal
+            assert path_cost(path) == path_cost(expected)
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"car_store": True}, {"sleep": True}, {"routing": "trees"},
+                                    {"two_phase": True}])
+def test_restore_replays_deterministically(kwargs):
+    env = make_env(BIG_SCENARIO, **kwargs)
+    trace(env, 30)
+    snapshot = env.snapshot()
+    before = state(env)
+    first = trace(env, 100)
+    env.restore(snapshot)
+    assert state(env) == before
+    assert trace(env, 100) == first
+
+
+@pytest.mark.parametrize("scenario", [BIG_SCENARIO, TWO_CROSSING])
+def test_fast_forward_matches_play_step(scenario):
+    stepped = make_env(scenario)
+    forwarded = make_env(scenario)
+    ticks = 0
+    while ticks < 200:
+        advanced, game_over = forwarded.fast_forward(200 - ticks)
+        for _ in range(advanced):
+            stepped.play_step()
+        ticks += advanced
+        assert state(stepped) == state(forwarded)
+        if game_over:
+            break
+
+
+@pytest.mark.parametrize("kwargs", [{"sleep": True}, {"broad_phase": False}, {"car_store": True}])
+def test_options_keep_the_default_trace(kwargs):
+    for scenario in (BIG_SCENARIO, TWO_CROSSING):
+        assert trace(make_env(scenario, **kwargs), 150) == trace(make_env(scenario), 150)
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"sleep": True},
+    {"broad_phase": False},
+    {"car_store": True},
+    pytest.param({"decision_workers": 2}, marks=pytest.mark.skipif(not fork_available(), reason="needs fork")),
+    pytest.param({"replica_workers": 2}, marks=pytest.mark.skipif(not fork_available(), reason="needs fork")),
+])
+def test_two_phase_options_keep_the_two_phase_trace(kwargs):
+    # A two-phase tick lets all cars decide before any moves, so it is compared with itself, not with play_step
+    for scenario in (BIG_SCENARIO, TWO_CROSSING):
+        env = make_env(scenario, two_phase=True, **kwargs)
+        try:
+            assert trace(env, 150) == trace(make_env(scenario, two_phase=True), 150)
+        finally:
+            env.close()